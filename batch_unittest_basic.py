@@ -0,0 +1,77 @@
+"""
+Unittests for the NumPy batch evaluator of Stonehenge positions. They are
+skipped when NumPy is not installed.
+"""
+import random
+import unittest
+
+from stonehenge import COUNT_MASK, COUNT_WIDTH, P1_CLAIMED, P2_CLAIMED, \
+    create_start_henge_state
+from stonehenge_batch import P1, P2, EMPTY, get_batch_evaluator, np
+
+
+def random_positions(side_length, count, seed=0):
+    """
+    Return count positions of random games on the board with side_length,
+    some of them finished.
+    """
+    rng = random.Random(seed)
+    positions = []
+    for index in range(count):
+        state = create_start_henge_state(index % 2 == 0, side_length)
+        for _ in range(rng.randrange(len(state.get_possible_moves()) + 1)):
+            moves = state.get_possible_moves()
+            if not moves:
+                break
+            state = state.make_move(rng.choice(moves))
+        positions.append(state)
+    return positions
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class BatchEvaluatorUnitTests(unittest.TestCase):
+    def test_batch_matches_states(self):
+        """
+        Test that the counts, claimers, winners and moves of a batch are
+        those of each of its states.
+        """
+        codes = {P1_CLAIMED: P1, P2_CLAIMED: P2}
+        players = {'p1': P1, 'p2': P2, None: EMPTY}
+        for side_length in [1, 2, 3, 5, 8]:
+            evaluator = get_batch_evaluator(side_length)
+            states = random_positions(side_length, 60, side_length)
+            results = evaluator.evaluate(*evaluator.encode(states))
+            for row, state in enumerate(states):
+                lines = range(len(state.layout.line_masks))
+                self.assertEqual(
+                    list(results['p1_counts'][row]),
+                    [state.p1_counts >> COUNT_WIDTH * line & COUNT_MASK
+                     for line in lines])
+                self.assertEqual(
+                    list(results['claimers'][row]),
+                    [codes.get(claimer, EMPTY)
+                     for claimer in state.get_line_claimers()])
+                self.assertEqual(results['winners'][row],
+                                 players[state.get_winner()])
+                self.assertEqual(
+                    [state.layout.labels[cell] for cell in
+                     np.flatnonzero(results['legal'][row])],
+                    state.get_possible_moves())
+
+    def test_claims_from_cells_alone(self):
+        """
+        Test that without the claimers so far, every line is claimed by its
+        counts.
+        """
+        evaluator = get_batch_evaluator(1)
+        # cells A, B, C: Player 1 took A, Player 2 took C
+        results = evaluator.evaluate(np.array([[P1, EMPTY, P2]],
+                                              dtype=np.int8))
+        self.assertEqual(list(results['claimers'][0]),
+                         [P1, P2, P1, P2, EMPTY, EMPTY])
+        self.assertEqual(list(results['winners']), [EMPTY])
+        self.assertEqual(list(results['legal'][0]), [False, True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
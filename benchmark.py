@@ -0,0 +1,318 @@
+"""
+A benchmark suite for the games and the minimax strategies.
+
+Micro benchmarks time single methods of fixed StoneHengeState and
+SubtractSquareState positions, each call repeated until a sample takes at
+least min_time seconds. Macro benchmarks time one move of each minimax
+strategy on fixed positions, or of the strategies in
+MACRO_POSITION_STRATEGIES on the larger ones, starting every sample from a
+new game so that no transposition table is reused between samples.
+
+Every benchmark is warmed up once and then timed repeat times with garbage
+collection off, and reported by the median, minimum, mean and standard
+deviation of its seconds per call; the median is what baselines are
+compared on, as it is the least affected by a slow sample. Macro benchmarks
+also report the states they searched, which should not change at all
+between runs. The one exception is 'mp' with several workers, which race to
+fill the table they share; that table is cleared before every sample.
+
+    python benchmark.py                 run the suite and print the results
+    python benchmark.py save [path]     also write the results to path
+    python benchmark.py compare [path]  compare the results to those at path
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from game_interface import playable_games, usable_strategies
+from parallel_minimax import get_shared_table
+from stonehenge import StoneHengeState, create_start_henge_state
+from subtract_square_state import SubtractSquareState, clear_rough_outcomes
+
+BASELINE_PATH = 'bench_baseline.json'
+DEFAULT_REPEAT = 7
+DEFAULT_MIN_TIME = 0.02
+DEFAULT_TOLERANCE = 0.2
+MAX_NUMBER = 10 ** 6
+
+MICRO_SIDE_LENGTHS = [3, 5, 12]
+SUBTRACT_SQUARE_TOTAL = 1000
+SUBTRACT_SQUARE_LARGE_TOTAL = 10 ** 6 + 7
+MACRO_STRATEGIES = ['mr', 'mi', 'mra', 'mia', 'mp']
+
+# (game key, p1_starts, game options, moves made before the strategy moves)
+MACRO_POSITIONS = {
+    'subtract_square_60': ('s', True, {'count': 60}, []),
+    # the positions of minimax_unittest_basic.py, the first of which is
+    # STONEHENGE_MINIMAX_BOARD
+    'stonehenge_minimax_board': ('h', False, {'side_length': 3},
+                                 ['K', 'A', 'C', 'B', 'F', 'E', 'G', 'D',
+                                  'I']),
+    'stonehenge_not_immediate': ('h', True, {'side_length': 2},
+                                 ['A', 'F', 'D']),
+    'stonehenge_side_3': ('h', True, {'side_length': 3}, ['A', 'B'])}
+
+# the positions only some strategies are timed on, as they take too long for
+# the rest; 'mp' against 'mr' shows the speedup of searching in parallel
+MACRO_POSITION_STRATEGIES = {'stonehenge_side_3': ['mr', 'mp']}
+
+
+class Benchmark:
+    """
+    A piece of code to time.
+
+    name - the name its results are reported and compared under
+    setup - returns the argument of run
+    run - the code to time, given the result of setup
+    fresh - whether every call of run needs a new result of setup, in which
+            case each sample times a single call
+    """
+    name: str
+    setup: Callable[[], Any]
+    run: Callable[[Any], Any]
+    fresh: bool
+
+    def __init__(self, name: str, setup: Callable[[], Any],
+                 run: Callable[[Any], Any], fresh: bool = False) -> None:
+        """
+        Initialize a benchmark called name of run on the result of setup.
+        """
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.fresh = fresh
+
+
+def _time(run: Callable[[Any], Any], argument: Any, number: int) -> float:
+    """
+    Return the seconds it takes to call run on argument number times, with
+    garbage collection off.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            run(argument)
+        return time.perf_counter() - start
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def measure(benchmark: Benchmark, repeat: int = DEFAULT_REPEAT,
+            min_time: float = DEFAULT_MIN_TIME) -> Dict[str, Any]:
+    """
+    Time benchmark repeat times and return the statistics of its seconds per
+    call.
+
+    >>> stats = measure(Benchmark('sum', lambda: range(10), sum), 3, 0.001)
+    >>> stats['repeat'], stats['min'] <= stats['median']
+    (3, True)
+    """
+    argument = benchmark.setup()
+    benchmark.run(argument)
+    number = 1
+    if not benchmark.fresh:
+        while number < MAX_NUMBER and \
+                _time(benchmark.run, argument, number) < min_time:
+            number *= 10
+
+    samples = []
+    nodes = None
+    for _ in range(repeat):
+        if benchmark.fresh:
+            argument = benchmark.setup()
+        samples.append(_time(benchmark.run, argument, number) / number)
+        stats = getattr(argument, 'search_stats', None)
+        if stats is not None:
+            nodes = stats.nodes
+    return {'median': statistics.median(samples), 'min': min(samples),
+            'mean': statistics.mean(samples),
+            'stdev': statistics.stdev(samples) if repeat > 1 else 0.0,
+            'number': number, 'repeat': repeat, 'nodes': nodes}
+
+
+def _midgame(side_length: int) -> StoneHengeState:
+    """
+    Return a Stonehenge state with side_length after side_length moves.
+    """
+    state = create_start_henge_state(True, side_length)
+    for move in state.get_possible_moves()[::2][:side_length]:
+        state = state.make_move(move)
+    return state
+
+
+def micro_benchmarks() -> List[Benchmark]:
+    """
+    Return the benchmarks of single game methods.
+    """
+    benchmarks = []
+    for side_length in MICRO_SIDE_LENGTHS:
+        setup = partial(_midgame, side_length)
+        move = setup().get_possible_moves()[0]
+        prefix = 'stonehenge{}.'.format(side_length)
+        benchmarks += [
+            Benchmark(prefix + 'make_move', setup,
+                      lambda state, move=move: state.make_move(move)),
+            Benchmark(prefix + 'get_possible_moves', setup,
+                      StoneHengeState.get_possible_moves),
+            Benchmark(prefix + 'get_winner', setup,
+                      StoneHengeState.get_winner),
+            Benchmark(prefix + '__str__', setup, StoneHengeState.__str__),
+            Benchmark(prefix + 'look_ahead', setup,
+                      StoneHengeState.look_ahead)]
+    benchmarks.append(Benchmark(
+        'subtract_square.rough_outcome',
+        partial(SubtractSquareState, True, SUBTRACT_SQUARE_TOTAL),
+        _uncached_rough_outcome))
+    benchmarks.append(Benchmark(
+        'subtract_square_large.get_possible_moves',
+        partial(SubtractSquareState, True, SUBTRACT_SQUARE_LARGE_TOTAL),
+        SubtractSquareState.get_possible_moves))
+    return benchmarks
+
+
+def _uncached_rough_outcome(state: SubtractSquareState) -> float:
+    """
+    Return the rough outcome of state worked out again, not looked up in the
+    memo of rough outcomes.
+    """
+    clear_rough_outcomes()
+    return state.rough_outcome()
+
+
+def _game_at(position: str, clear_shared_table: bool = False) -> Any:
+    """
+    Return a new game at the macro benchmark position, first clearing the
+    table that the workers of parallel_minimax share across moves if
+    clear_shared_table.
+    """
+    if clear_shared_table:
+        get_shared_table().clear()
+    game_key, p1_starts, options, moves = MACRO_POSITIONS[position]
+    game = playable_games[game_key](p1_starts, **options)
+    for move in moves:
+        game.current_state = game.current_state.make_move(
+            game.str_to_move(move))
+    return game
+
+
+def macro_benchmarks() -> List[Benchmark]:
+    """
+    Return the benchmarks of one move of each minimax strategy.
+    """
+    return [Benchmark('{}.{}'.format(key, position),
+                      partial(_game_at, position, key == 'mp'),
+                      usable_strategies[key],
+                      fresh=True)
+            for key in MACRO_STRATEGIES for position in MACRO_POSITIONS
+            if key in MACRO_POSITION_STRATEGIES.get(position,
+                                                    MACRO_STRATEGIES)]
+
+
+def run_benchmarks(benchmarks: Optional[List[Benchmark]] = None,
+                   repeat: int = DEFAULT_REPEAT,
+                   min_time: float = DEFAULT_MIN_TIME) -> Dict[str, Any]:
+    """
+    Measure benchmarks, by default the whole suite, and return their results
+    along with the Python and platform they were measured on.
+    """
+    if benchmarks is None:
+        benchmarks = micro_benchmarks() + macro_benchmarks()
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'benchmarks': {benchmark.name: measure(benchmark, repeat,
+                                                   min_time)
+                           for benchmark in benchmarks}}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[tuple]:
+    """
+    Return (name, baseline median, median, ratio, verdict) for each
+    benchmark of results, where verdict is 'slower' or 'faster' if its median
+    moved by more than tolerance from the baseline, 'new' if the baseline
+    does not have it and 'same' otherwise.
+
+    >>> old = {'benchmarks': {'a': {'median': 1.0}, 'b': {'median': 1.0}}}
+    >>> new = {'benchmarks': {'a': {'median': 1.5}, 'b': {'median': 1.1}, \
+    'c': {'median': 1.0}}}
+    >>> [row[-1] for row in compare(new, old)]
+    ['slower', 'same', 'new']
+    """
+    rows = []
+    for name, stats in results['benchmarks'].items():
+        old = baseline['benchmarks'].get(name)
+        if old is None:
+            rows.append((name, None, stats['median'], None, 'new'))
+            continue
+        ratio = stats['median'] / old['median']
+        verdict = 'slower' if ratio > 1 + tolerance else \
+            'faster' if ratio < 1 / (1 + tolerance) else 'same'
+        rows.append((name, old['median'], stats['median'], ratio, verdict))
+    return rows
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """
+    Return a table of the statistics of results, in microseconds.
+    """
+    row = '{:<42}{:>12}{:>12}{:>10}{:>10}'
+    lines = [row.format('benchmark', 'median us', 'min us', 'stdev %',
+                        'nodes')]
+    for name, stats in results['benchmarks'].items():
+        lines.append(row.format(
+            name, '{:.2f}'.format(stats['median'] * 1e6),
+            '{:.2f}'.format(stats['min'] * 1e6),
+            '{:.1f}'.format(stats['stdev'] / stats['mean'] * 100),
+            '-' if stats['nodes'] is None else stats['nodes']))
+    return '\n'.join(lines)
+
+
+def format_comparison(rows: List[tuple]) -> str:
+    """
+    Return a table of the rows of compare(), in microseconds.
+    """
+    row = '{:<42}{:>12}{:>12}{:>8}{:>8}'
+    lines = [row.format('benchmark', 'before us', 'after us', 'ratio', '')]
+    for name, old, new, ratio, verdict in rows:
+        lines.append(row.format(
+            name, '-' if old is None else '{:.2f}'.format(old * 1e6),
+            '{:.2f}'.format(new * 1e6),
+            '-' if ratio is None else '{:.2f}'.format(ratio), verdict))
+    return '\n'.join(lines)
+
+
+def main(arguments: List[str]) -> int:
+    """
+    Run the suite from the command line and return the exit status, which is
+    1 if a comparison found a benchmark that got slower.
+    """
+    command = arguments[0] if arguments else 'run'
+    path = arguments[1] if len(arguments) > 1 else BASELINE_PATH
+    results = run_benchmarks()
+    print(format_results(results))
+    if command == 'save':
+        with open(path, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print("Wrote the baseline to {}.".format(path))
+    elif command == 'compare':
+        with open(path) as baseline_file:
+            rows = compare(results, json.load(baseline_file))
+        print()
+        print(format_comparison(rows))
+        if any(row[-1] == 'slower' for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,54 @@
+"""
+Unittests for the benchmark suite.
+"""
+import json
+import os
+import tempfile
+import unittest
+
+from benchmark import compare, macro_benchmarks, micro_benchmarks, \
+    run_benchmarks
+
+
+class BenchmarkUnitTests(unittest.TestCase):
+    def test_results_compare_against_saved_baseline(self):
+        """
+        Test that the results of a run can be saved as a baseline, that a run
+        is not slower than itself and that a slower run is reported as such.
+        """
+        benchmarks = [benchmark for benchmark in micro_benchmarks()
+                      if benchmark.name.startswith('stonehenge3.')]
+        results = run_benchmarks(benchmarks, repeat=3, min_time=0.001)
+        self.assertEqual(sorted(results['benchmarks']),
+                         sorted(benchmark.name for benchmark in benchmarks))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            with open(path, 'w') as baseline_file:
+                json.dump(results, baseline_file)
+            with open(path) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        self.assertTrue(all(row[-1] == 'same'
+                            for row in compare(results, baseline)))
+        for stats in baseline['benchmarks'].values():
+            stats['median'] /= 2
+        self.assertTrue(all(row[-1] == 'slower'
+                            for row in compare(results, baseline)))
+
+    def test_macro_benchmarks_count_nodes(self):
+        """
+        Test that every minimax benchmark reports the same number of states
+        searched on every run.
+        """
+        benchmarks = [benchmark for benchmark in macro_benchmarks()
+                      if benchmark.name.endswith('.stonehenge_not_immediate')]
+        first = run_benchmarks(benchmarks, repeat=2)['benchmarks']
+        second = run_benchmarks(benchmarks, repeat=2)['benchmarks']
+        for name, stats in first.items():
+            self.assertGreater(stats['nodes'], 0)
+            self.assertEqual(stats['nodes'], second[name]['nodes'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,12 +2,17 @@
 """
 from typing import List, Dict, Any
 from game import GameState, Game
+from zobrist import TURN_KEY, make_keys
 
 LEFT_HAND = 'l'
 RIGHT_HAND = 'r'
 ALL_HANDS = [LEFT_HAND, RIGHT_HAND]
 PLAYERS = ['p1', 'p2']
 
+# the Zobrist key of each value, 0 to 4, of each player's hand
+_HAND_KEYS = {(p, hand): make_keys('chopsticks {} {}'.format(p, hand), 5)
+              for p in PLAYERS for hand in ALL_HANDS}
+
 
 class ChopsticksGameState(GameState):
     """
@@ -17,23 +22,46 @@ class ChopsticksGameState(GameState):
     player - the player currently playing the game (p1 or p2)
     hands - a dictionary containing information about
             the value each player's hands has
+    zobrist - the Zobrist hash of the hands and the current player
     """
-    player: str
     hands: Dict[str, Dict[str, int]]
+    zobrist: int
+    SUPPORTS_PUSH: bool = True
 
     def __init__(self, player: str, hands: Dict[str, Dict[str, int]]) -> None:
         """ Initialize the current state of the game
 
-        >>> x = ChopsticksGameState('p1', {'p1': {'l': 1, \
+        >>> ChopsticksGameState('p1', {'p1': {'l': 1, \
         'r': 1}, 'p2': {'l': 1, 'r': 1}}).player
         'p1'
-        >>> x = ChopsticksGameState('p1', {'p1': {'l': 1, \
+        >>> ChopsticksGameState('p1', {'p1': {'l': 1, \
         'r': 1}, 'p2': {'l': 1, 'r': 1}}).hands
-        {'p1': {'LEFT_HAND': 1, 'RIGHT_HAND': 1}, \
-        'p2': {'LEFT_HAND': 1, 'RIGHT_HAND': 1}}
+        {'p1': {'l': 1, 'r': 1}, 'p2': {'l': 1, 'r': 1}}
         """
-        super().__init__(player)
+        super().__init__(player == PLAYERS[0])
         self.hands = hands
+        self.zobrist = TURN_KEY if self.p1_turn else 0
+        for p in PLAYERS:
+            for hand in ALL_HANDS:
+                self.zobrist ^= _HAND_KEYS[(p, hand)][hands[p][hand]]
+        self._pushed = None
+
+    @property
+    def player(self) -> str:
+        """ The player whose turn it is
+        """
+        return self.get_current_player_name()
+
+    def get_next_player(self) -> str:
+        """ Return the player who moves after the current player
+
+        >>> ChopsticksGameState('p1', {'p1': {'l': 1, \
+        'r': 1}, 'p2': {'l': 1, 'r': 1}}).get_next_player()
+        'p2'
+        """
+        if self.p1_turn:
+            return PLAYERS[1]
+        return PLAYERS[0]
 
     def __eq__(self, other: Any) -> bool:
         """ check if current game state is equal to other game state
@@ -55,7 +83,7 @@ class ChopsticksGameState(GameState):
         >>> x = ChopsticksGameState('p1', {'p1': {'l': 1, \
         'r': 1}, 'p2': {'l': 1, 'r': 1}})
         >>> x.get_current_hands()
-        {'LEFT_HAND': 1, 'RIGHT_HAND': 1}
+        {'l': 1, 'r': 1}
         """
         return self.hands[self.get_current_player_name()]
 
@@ -105,13 +133,94 @@ class ChopsticksGameState(GameState):
                                                  move_to_make[0]]) % 5
         return ChopsticksGameState(enemy, new_hands)
 
+    def _can_finish(self) -> bool:
+        """ Return whether the current player can take the last of the
+        enemy's hands in one move
+        """
+        return any(not any(self.make_move(move).get_current_hands().values())
+                   for move in self.get_possible_moves())
+
+    def rough_outcome(self) -> float:
+        """ Return WIN if the current player can win in one move, LOSE if
+        every move lets the enemy win in one move, and DRAW otherwise
+
+        >>> ChopsticksGameState('p1', {'p1': {'l': 1, \
+        'r': 0}, 'p2': {'l': 4, 'r': 0}}).rough_outcome()
+        1
+        >>> ChopsticksGameState('p1', {'p1': {'l': 4, \
+        'r': 0}, 'p2': {'l': 1, 'r': 1}}).rough_outcome()
+        -1
+        >>> ChopsticksGameState('p1', {'p1': {'l': 1, \
+        'r': 1}, 'p2': {'l': 1, 'r': 1}}).rough_outcome()
+        0
+        """
+        if not any(self.get_current_hands().values()):
+            return self.LOSE
+        if self._can_finish():
+            return self.WIN
+        if all(self.make_move(move)._can_finish()
+               for move in self.get_possible_moves()):
+            return self.LOSE
+        return self.DRAW
+
+    def state_key(self) -> int:
+        """ Return the 64-bit Zobrist hash of this state, for use in caches
+
+        >>> x = ChopsticksGameState('p1', {'p1': {'l': 1, \
+        'r': 1}, 'p2': {'l': 1, 'r': 1}})
+        >>> x.make_move('ll').state_key() == ChopsticksGameState('p2', \
+        {'p1': {'l': 1, 'r': 1}, 'p2': {'l': 2, 'r': 1}}).state_key()
+        True
+        """
+        return self.zobrist
+
+    def push(self, move_to_make: str) -> None:
+        """ Implement a move in place, so that pop() can undo it
+
+        >>> x = ChopsticksGameState('p1', {'p1': {'l': 1, \
+        'r': 1}, 'p2': {'l': 1, 'r': 1}})
+        >>> x.push('ll')
+        >>> x.player, x.hands['p2']
+        ('p2', {'l': 2, 'r': 1})
+        >>> x.pop()
+        >>> x.player, x.hands['p2']
+        ('p1', {'l': 1, 'r': 1})
+        """
+        player = self.get_current_player_name()
+        enemy = self.get_next_player()
+        enemy_hands = self.hands[enemy]
+        if self._pushed is None:
+            self._pushed = []
+        self._pushed.append(move_to_make)
+        old_value = enemy_hands[move_to_make[1]]
+        self._pushed.append(old_value)
+        enemy_hands[move_to_make[1]] = (old_value +
+                                        self.hands[player][
+                                            move_to_make[0]]) % 5
+        keys = _HAND_KEYS[(enemy, move_to_make[1])]
+        self.zobrist ^= (keys[old_value] ^
+                         keys[enemy_hands[move_to_make[1]]] ^ TURN_KEY)
+        self.p1_turn = not self.p1_turn
+
+    def pop(self) -> None:
+        """ Undo the most recent push() that has not been undone yet
+        """
+        old_value = self._pushed.pop()
+        move_to_make = self._pushed.pop()
+        self.p1_turn = not self.p1_turn
+        enemy = self.get_next_player()
+        keys = _HAND_KEYS[(enemy, move_to_make[1])]
+        self.zobrist ^= (keys[old_value] ^
+                         keys[self.hands[enemy][move_to_make[1]]] ^ TURN_KEY)
+        self.hands[enemy][move_to_make[1]] = old_value
+
     def __str__(self) -> str:
         """ Return info about the state of the game in string format
 
         >>> x = ChopsticksGameState('p1', {'p1': {'l': 1, \
         'r': 1}, 'p2': {'l': 1, 'r': 1}})
         >>> print(x)
-        [player = p1, hands = p1: 1-1,p2: 1-1]
+        [player = p1, hands = p1: 1-1, p2: 1-1]
         """
         hands_str = ', '.join(
             ['{}: {}-{}'.format(k, v[LEFT_HAND], v[RIGHT_HAND]) for k, v in
@@ -194,7 +303,7 @@ class ChopsticksGame(Game):
     def is_winner(self, player: str) -> bool:
         """ Check if player is the winner
         """
-        enemy = GameState(player).get_next_player()
+        enemy = PLAYERS[1] if player == PLAYERS[0] else PLAYERS[0]
         return self.is_over(self.current_state)\
             and self.current_state.hands[enemy][LEFT_HAND] == 0 \
             and self.current_state.hands[enemy][RIGHT_HAND] == 0
@@ -0,0 +1,164 @@
+"""
+A retrograde-analysis solver for Chopsticks.
+
+Minimax cannot search Chopsticks because players can keep returning to the
+same hands forever. Instead, every state reachable from the start is listed
+and labelled backwards from the finished games: a state is a WIN for the
+player to move if some move reaches a LOSE for the opponent, and a LOSE if
+every move reaches a WIN for the opponent. States that never get a label
+can be played forever by both sides and are a DRAW.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+from chopsticks import ChopsticksGame, ChopsticksGameState, PLAYERS
+from game_state import GameState
+
+# each state_key() maps to (outcome for the player to move, moves until the
+# game ends, best move or None if the game is over)
+Solution = Dict[int, Tuple[int, int, Any]]
+
+
+def reachable_states(game: ChopsticksGame) -> Dict[int,
+                                                   ChopsticksGameState]:
+    """
+    Return every state reachable from the starting states of game, with
+    either player moving first, keyed on their state_key().
+
+    >>> len(reachable_states(ChopsticksGame(True))) <= 2 * 5 ** 4
+    True
+    """
+    states = {}
+    queue = deque()
+    for player in PLAYERS:
+        start = ChopsticksGameState(player, _start_hands())
+        states[start.state_key()] = start
+        queue.append(start)
+
+    while queue:
+        state = queue.popleft()
+        if game.is_over(state):
+            continue
+        for move in state.get_possible_moves():
+            child = state.make_move(move)
+            key = child.state_key()
+            if key not in states:
+                states[key] = child
+                queue.append(child)
+    return states
+
+
+def _start_hands() -> Dict[str, Dict[str, int]]:
+    """
+    Return the hands both players start with.
+    """
+    return ChopsticksGame(True).current_state.get_hands_copy()
+
+
+def solve(game: ChopsticksGame) -> Solution:
+    """
+    Label every reachable state of game with its outcome for the player to
+    move, the number of moves until the game ends with best play, and the
+    move that achieves it.
+
+    Winners pick the quickest win and losers the slowest loss, so following
+    the best moves always ends the game when it is not a DRAW.
+
+    >>> game = ChopsticksGame(True)
+    >>> solution = solve(game)
+    >>> solution[game.current_state.state_key()][0] in [GameState.WIN, \
+    GameState.LOSE, GameState.DRAW]
+    True
+    """
+    states = reachable_states(game)
+    children = {}
+    parents = {key: [] for key in states}
+    remaining = {}
+    solution = {}
+    queue = deque()
+
+    for key, state in states.items():
+        if game.is_over(state):
+            # The player to move has no hands left: the last move won.
+            solution[key] = (GameState.LOSE, 0, None)
+            queue.append(key)
+            continue
+        moves = [(move, state.make_move(move).state_key())
+                 for move in state.get_possible_moves()]
+        children[key] = moves
+        remaining[key] = len(moves)
+        for _, child in moves:
+            parents[child].append(key)
+
+    while queue:
+        key = queue.popleft()
+        outcome, depth, _ = solution[key]
+        for parent in parents[key]:
+            if parent in solution:
+                continue
+            if outcome == GameState.LOSE:
+                solution[parent] = (GameState.WIN, depth + 1,
+                                    _pick_move(children[parent], key))
+                queue.append(parent)
+            else:
+                remaining[parent] -= 1
+                if remaining[parent] == 0:
+                    # Every move loses; the slowest loss is found last.
+                    solution[parent] = (GameState.LOSE, depth + 1,
+                                        _pick_move(children[parent], key))
+                    queue.append(parent)
+
+    for key, moves in children.items():
+        if key not in solution:
+            drawing = [move for move, child in moves
+                       if child not in solution or
+                       solution[child][0] != GameState.WIN]
+            solution[key] = (GameState.DRAW, -1, drawing[0])
+    return solution
+
+
+def _pick_move(moves: List[Tuple[Any, int]], child: int) -> Any:
+    """
+    Return the first move of moves that leads to the state child.
+    """
+    for move, key in moves:
+        if key == child:
+            return move
+    return None
+
+
+_SOLUTION = {}
+
+
+def get_solution() -> Solution:
+    """
+    Return the solution of Chopsticks, solving it the first time only.
+    """
+    if not _SOLUTION:
+        _SOLUTION.update(solve(ChopsticksGame(True)))
+    return _SOLUTION
+
+
+def chopsticks_solver_strategy(game: Any) -> Any:
+    """
+    Return the best move for the current state of a game of Chopsticks,
+    looked up in the precomputed solution.
+
+    Raise ValueError if the state cannot be reached from the start of a
+    game, and so is not in the solution.
+    """
+    if not isinstance(game, ChopsticksGame):
+        raise ValueError("This strategy can only play Chopsticks.")
+    state = game.current_state
+    solved = get_solution().get(state.state_key())
+    if solved is None:
+        raise ValueError("The state {} is not reachable from the start of a "
+                         "game, so it has not been solved.".format(state))
+    return solved[2]
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
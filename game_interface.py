@@ -4,30 +4,61 @@ Please fill in the TODO's (i.e. importing games and strategies as needed)
 
 Note: You do not have to run python_ta on this file.
 You may import your games from A1 (i.e. Chopsticks). However, the minimax
-strategy cannot be used on Chopsticks unless you account for infinite loops.
-(You do not have to worry about this for the assignment: only do it for
-your own curiousity!)
+strategy cannot be used on Chopsticks unless you account for infinite loops,
+so it is not offered there, see unusable_strategies. Use the 'cs' strategy
+instead, which solves Chopsticks ahead of time with retrograde analysis.
 """
 # TODO: import the modules needed to make game_interface run.
+import sys
 from strategy import *
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 from subtract_square_game import SubtractSquareGame
 from stonehenge import StonehengeGame
+from chopsticks import ChopsticksGame
 from strategy import rough_outcome_strategy, recursive_minimax, \
-    iterative_minimax_strategy
+    iterative_minimax_strategy, recursive_minimax_alphabeta, \
+    iterative_minimax_alphabeta, iterative_deepening
+from subtract_square_solver import subtract_square_solver_strategy
+from chopsticks_solver import chopsticks_solver_strategy
+from parallel_minimax import parallel_minimax
+from stonehenge_book import book_strategy
+from transposition import TranspositionTable, DEFAULT_TABLE_SIZE
+from tracing import TurnSpan, TurnTracer
 
 # TODO: Replace None with the corresponding class name for your games.
 # 'h' should map to Stonehenge.
 playable_games = {'s': SubtractSquareGame,
-                  'h': StonehengeGame}
+                  'h': StonehengeGame,
+                  'c': ChopsticksGame}
 
 # TODO: Replace None with the corresponding function names for your strategies.
 # 'mr' should map to your recursive implementation of minimax while
 # 'mi' should map to your iterative implementation of minimax
+# 'mra' and 'mia' are the same searches with alpha-beta pruning
+# 'ss' looks SubtractSquare moves up in a precomputed table
+# 'cs' looks Chopsticks moves up in a precomputed table
+# 'id' searches deeper and deeper until its time per move runs out
+# 'mp' is recursive minimax with the root moves searched in parallel
+# 'b' plays Stonehenge openings from the opening book, then plays like 'mra';
+# book_strategy can put the book in front of any other strategy the same way
 usable_strategies = {'i': interactive_strategy,
                      'ro': rough_outcome_strategy,
                      'mr': recursive_minimax,
-                     'mi': iterative_minimax_strategy}
+                     'mi': iterative_minimax_strategy,
+                     'mra': recursive_minimax_alphabeta,
+                     'mia': iterative_minimax_alphabeta,
+                     'ss': subtract_square_solver_strategy,
+                     'cs': chopsticks_solver_strategy,
+                     'id': iterative_deepening,
+                     'mp': parallel_minimax,
+                     'b': book_strategy(recursive_minimax_alphabeta)}
+
+# the strategies that cannot play each game: each solver only plays its own
+# game, and the exhaustive searches never finish on Chopsticks, where
+# positions repeat
+unusable_strategies = {'s': {'cs'},
+                       'h': {'cs', 'ss'},
+                       'c': {'ss', 'mr', 'mi', 'mra', 'mia', 'mp', 'b'}}
 
 
 class GameInterface:
@@ -37,7 +68,11 @@ class GameInterface:
     """
 
     def __init__(self, game: Any, p1_strategy: Callable,
-                 p2_strategy: Callable[[Any], Any]) -> None:
+                 p2_strategy: Callable[[Any], Any],
+                 table_size: int = DEFAULT_TABLE_SIZE,
+                 p1_starts: Optional[bool] = None,
+                 trace_path: Optional[str] = None,
+                 trace_format: Optional[str] = None) -> None:
         """
         Initialize this GameInterface, setting its active game to game, and
         using the strategies p1_strategy for Player 1 and p2_strategy for
@@ -49,26 +84,61 @@ class GameInterface:
         :type p1_strategy:
         :param p2_strategy: The strategy for Play 2.
         :type p2_strategy:
+        :param table_size: The most positions the minimax strategies may
+                           keep in their transposition table during play.
+        :type table_size: int
+        :param p1_starts: Whether Player 1 makes the first move, or None to
+                          ask.
+        :type p1_starts: bool
+        :param trace_path: The file to write the span of every turn to, or
+                           None not to trace the game.
+        :type trace_path: str
+        :param trace_format: 'jsonl' or 'chrome', or None to pick by the
+                             extension of trace_path; see tracing.py.
+        :type trace_format: str
         """
-        first_player = input("Type y if player 1 is to make the first move: ")
-        is_p1_turn = False
-        if first_player.lower() == 'y':
-            is_p1_turn = True
+        is_p1_turn = p1_starts
+        if is_p1_turn is None:
+            first_player = input(
+                "Type y if player 1 is to make the first move: ")
+            is_p1_turn = first_player.lower() == 'y'
 
         self.game = game(is_p1_turn)
         self.p1_strategy = p1_strategy
         self.p2_strategy = p2_strategy
+        self.table_size = table_size
+        self.trace_path = trace_path
+        self.trace_format = trace_format
 
     def play(self) -> None:
         """
         Play the game.
         """
+        tracer = None
+        if self.trace_path is not None:
+            tracer = TurnTracer(self.trace_path, self.trace_format)
+        try:
+            self._play(tracer)
+        finally:
+            if tracer is not None:
+                tracer.close()
+
+    def _play(self, tracer: Optional[TurnTracer]) -> None:
+        """
+        Play the game, recording the span of every turn with tracer if it is
+        not None.
+        """
         current_state = self.game.current_state
 
+        # Share one transposition table across every move of this session;
+        # its hits and misses can be read from it after each move.
+        self.game.transposition_table = TranspositionTable(self.table_size)
+
         print(self.game.get_instructions())
         print(current_state)
 
         # Pick moves until the game is over
+        turn = 0
         while not self.game.is_over(current_state):
             move_to_make = None
 
@@ -79,21 +149,36 @@ class GameInterface:
                 print(move)
 
             # Pick a (legal) move.
-            while not current_state.is_valid_move(move_to_make):
+            self.game.search_stats = None
+            current_player_name = current_state.get_current_player_name()
+            span = TurnSpan(turn, current_player_name)
+            while not span.timed('validation', current_state.is_valid_move,
+                                 move_to_make):
                 current_strategy = self.p2_strategy
-                if current_state.get_current_player_name() == 'p1':
+                if current_player_name == 'p1':
                     current_strategy = self.p1_strategy
-                move_to_make = current_strategy(self.game)
+                move_to_make = span.timed('strategy', current_strategy,
+                                          self.game)
 
             # Apply the move
-            current_player_name = current_state.get_current_player_name()
-            new_game_state = current_state.make_move(move_to_make)
+            new_game_state = span.timed('apply', current_state.make_move,
+                                        move_to_make)
             self.game.current_state = new_game_state
             current_state = self.game.current_state
 
             print("{} made the move {}. The game's state is now:".format(
                 current_player_name, move_to_make))
             print(current_state)
+            stats = self.game.search_stats
+            if stats is not None and stats.depth > 0:
+                print("{} searched {} states to a depth of {}.".format(
+                    current_player_name, stats.nodes, stats.depth))
+
+            if tracer is not None:
+                span.move = move_to_make
+                span.nodes = stats.nodes if stats is not None else None
+                tracer.record(span)
+            turn += 1
 
         # Print out the winner of the game
         if self.game.is_winner("p1"):
@@ -109,25 +194,30 @@ if __name__ == '__main__':
                        playable_games[key] is not None else
                        "'{}': None".format(key) for key in playable_games])
 
-    strategies = ", ".join(["'{}': {}".format(key,
-                                              usable_strategies[key].__name__)
-                            if usable_strategies[key] is not None else
-                            "'{}': None".format(key)
-                            for key in usable_strategies])
-
     chosen_game = ''
     while chosen_game not in playable_games.keys():
         chosen_game = input(
             "Select the game you want to play ({}): ".format(games))
 
+    # Only offer the strategies that can play the chosen game.
+    choices = [key for key in usable_strategies
+               if key not in unusable_strategies.get(chosen_game, set())]
+    strategies = ", ".join(["'{}': {}".format(key,
+                                              usable_strategies[key].__name__)
+                            if usable_strategies[key] is not None else
+                            "'{}': None".format(key)
+                            for key in choices])
+
     p1 = ''
     p2 = ''
 
-    while p1 not in usable_strategies.keys():
+    while p1 not in choices:
         p1 = input("Select the strategy for Player 1 ({}): ".format(strategies))
 
-    while p2 not in usable_strategies.keys():
+    while p2 not in choices:
         p2 = input("Select the strategy for Player 2 ({}): ".format(strategies))
 
+    # An optional argument is the file to trace every turn to.
     GameInterface(playable_games[chosen_game], usable_strategies[p1],
-                  usable_strategies[p2]).play()
+                  usable_strategies[p2],
+                  trace_path=sys.argv[1] if len(sys.argv) > 1 else None).play()
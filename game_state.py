@@ -14,10 +14,14 @@ class GameState:
     LOSE - score if player is in a losing position
     DRAW - score if player is in a tied position
     p1_turn - whether it is p1's turn or not
+    SUPPORTS_PUSH - whether push and pop can be used on this kind of state
     """
+    __slots__ = ('p1_turn',)
+
     WIN: int = 1
     LOSE: int = -1
     DRAW: int = 0
+    SUPPORTS_PUSH: bool = False
     p1_turn: bool
 
     def __init__(self, is_p1_turn: bool) -> None:
@@ -55,6 +59,24 @@ class GameState:
         """
         raise NotImplementedError
 
+    def push(self, move: Any) -> None:
+        """
+        Apply move to this GameState in place, so that a later pop() restores
+        it exactly.
+
+        This is an optional, faster alternative to make_move for searches
+        that visit many states; it is only available when SUPPORTS_PUSH is
+        True. A state must not be used as a dictionary key while it is being
+        changed this way.
+        """
+        raise NotImplementedError
+
+    def pop(self) -> None:
+        """
+        Undo the most recent push() that has not been undone yet.
+        """
+        raise NotImplementedError
+
     def is_valid_move(self, move: Any) -> bool:
         """
         Return whether move is a valid move for this GameState.
@@ -68,6 +90,29 @@ class GameState:
         """
         raise NotImplementedError
 
+    def state_key(self) -> Any:
+        """
+        Return a hashable key identifying this state, for use in caches.
+
+        Two states with the same key must be equal for the purposes of the
+        game, including whose turn it is. Subclasses return a 64-bit Zobrist
+        hash (see zobrist.py) kept up to date by every move, so that caches
+        never have to build a string of the whole state; two different
+        states share a hash so rarely that caches ignore it.
+        """
+        return repr(self)
+
+    def canonical_key(self) -> Any:
+        """
+        Return a key like state_key() that is also shared by every state this
+        state can be turned into by a symmetry of the game, such as rotating
+        or reflecting its board. Such states have the same outcome, so caches
+        can store them once.
+
+        Games without symmetries use state_key().
+        """
+        return self.state_key()
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
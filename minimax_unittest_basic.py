@@ -20,12 +20,21 @@ strategy with Chopsticks either, unless you handle repeated/looping states.
 
 import unittest
 from unittest.mock import patch
+from concurrent.futures import ProcessPoolExecutor
 import inspect
 
 # Import the student solution
 from game_interface import playable_games, usable_strategies
+from subtract_square_solver import SubtractSquareSolver
+from transposition import SharedTranspositionTable
+from parallel_minimax import get_executor, get_shared_table, \
+    shutdown_executors
 minimax_iterative_strategy = usable_strategies['mi']
 minimax_recursive_strategy = usable_strategies['mr']
+minimax_iterative_alphabeta = usable_strategies['mia']
+minimax_recursive_alphabeta = usable_strategies['mra']
+iterative_deepening_strategy = usable_strategies['id']
+minimax_parallel_strategy = usable_strategies['mp']
 StonehengeGame = playable_games['h']
 SubtractSquareGame = playable_games['s']
 
@@ -43,6 +52,17 @@ STONEHENGE_MINIMAX_BOARD = """\
         2   2   1
 """
 
+
+def store_in_shared_table(table, start):
+    """
+    Store the score of every key from start to start + 99 in table, and
+    return how many keys of the previous hundred were already there.
+    """
+    for key in range(start, start + 100):
+        table.put(key, key % 3 - 1)
+    return sum(key in table for key in range(start - 100, start))
+
+
 class MinimaxUnitTests(unittest.TestCase):
     def test_iterative_subtract_square_4(self):
         """
@@ -232,6 +252,234 @@ class MinimaxUnitTests(unittest.TestCase):
                              expected_move, move_chosen, str(new_state)
                          ))
 
+    def test_recursive_transposition_table_reused(self):
+        """
+        Test that recursive minimax stores solved positions on the game and
+        reuses them when asked for the next move.
+        """
+        with patch('builtins.input', return_value='40'):
+            game = SubtractSquareGame(True)
+
+        minimax_recursive_strategy(game)
+        table = game.transposition_table
+        self.assertTrue(table.hits > 0,
+                        "Recursive minimax should reuse positions reached " +
+                        "through different move orders.")
+
+        table.reset_counters()
+        minimax_recursive_strategy(game)
+        self.assertEqual(table.misses, 0,
+                         "Asking for the same move again should be answered " +
+                         "entirely from the transposition table, but " +
+                         "{} positions were missed.".format(table.misses))
+
+    def make_stonehenge_game(self, side_length, p1_starts, moves_to_make):
+        """
+        A helper function that returns a game of Stonehenge after the given
+        moves are applied to it.
+        """
+        with patch('builtins.input', return_value=str(side_length)):
+            game = StonehengeGame(p1_starts)
+        for move in moves_to_make:
+            game.current_state = game.current_state.make_move(
+                game.str_to_move(move))
+        return game
+
+    def test_alphabeta_stonehenge_same_move_fewer_nodes(self):
+        """
+        Test that both alpha-beta strategies pick the expected move on the
+        Stonehenge boards above while visiting fewer states than recursive
+        minimax.
+        """
+        boards = [(3, False, ['K', 'A', 'C', 'B', 'F', 'E', 'G', 'D', 'I'],
+                   'H'),
+                  (2, True, ['A', 'F', 'D'], 'E')]
+        for side_length, p1_starts, moves_to_make, expected in boards:
+            game = self.make_stonehenge_game(side_length, p1_starts,
+                                             moves_to_make)
+            exhaustive_move = minimax_recursive_strategy(game)
+            exhaustive_nodes = game.search_stats.nodes
+
+            for strategy in [minimax_recursive_alphabeta,
+                             minimax_iterative_alphabeta]:
+                game = self.make_stonehenge_game(side_length, p1_starts,
+                                                 moves_to_make)
+                move_chosen = strategy(game)
+                self.assertEqual(move_chosen, game.str_to_move(expected),
+                                 ("{} should return the move {} but got " +
+                                  "{} instead.").format(strategy.__name__,
+                                                        expected,
+                                                        move_chosen))
+                self.assertTrue(game.search_stats.nodes < exhaustive_nodes,
+                                ("{} visited {} states, which is not fewer " +
+                                 "than the {} visited by recursive " +
+                                 "minimax.").format(strategy.__name__,
+                                                    game.search_stats.nodes,
+                                                    exhaustive_nodes))
+            self.assertEqual(exhaustive_move, game.str_to_move(expected))
+
+    def test_alphabeta_subtract_square_matches_exhaustive(self):
+        """
+        Test that each alpha-beta strategy picks the same move as its
+        exhaustive counterpart on games of SubtractSquare.
+        """
+        pairs = [(minimax_recursive_strategy, minimax_recursive_alphabeta),
+                 (minimax_iterative_strategy, minimax_iterative_alphabeta)]
+        for exhaustive, alphabeta in pairs:
+            for value in range(1, 60):
+                with patch('builtins.input', return_value=str(value)):
+                    game = SubtractSquareGame(True)
+                expected_move = exhaustive(game)
+                with patch('builtins.input', return_value=str(value)):
+                    game = SubtractSquareGame(True)
+                move_chosen = alphabeta(game)
+                self.assertEqual(move_chosen, expected_move,
+                                 ("{} on a game of SubtractSquare with a " +
+                                  "value of {} should return {} like {}, " +
+                                  "but returned {}.").format(
+                                     alphabeta.__name__, value, expected_move,
+                                     exhaustive.__name__, move_chosen))
+
+    def test_iterative_deepening_within_budget(self):
+        """
+        Test that iterative deepening finds a winning move when it has time
+        to, and stays inside a budget of states otherwise.
+        """
+        solver = SubtractSquareSolver()
+        for value in [4, 18, 30, 50]:
+            with patch('builtins.input', return_value=str(value)):
+                game = SubtractSquareGame(True)
+            move_chosen = iterative_deepening_strategy(game)
+            self.assertFalse(solver.is_winning(value - move_chosen),
+                             ("Iterative deepening on a game of " +
+                              "SubtractSquare with a value of {} returned " +
+                              "the losing move {}.").format(value,
+                                                            move_chosen))
+            self.assertTrue(game.search_stats.depth > 0)
+
+        with patch('builtins.input', return_value='200'):
+            game = SubtractSquareGame(True)
+        move_chosen = iterative_deepening_strategy(game, None, 100)
+        self.assertTrue(move_chosen in game.current_state.get_possible_moves())
+        self.assertTrue(game.search_stats.nodes <= 100,
+                        ("Iterative deepening visited {} states with a " +
+                         "budget of 100.").format(game.search_stats.nodes))
+
+    def test_parallel_matches_recursive(self):
+        """
+        Test that parallel minimax, splitting at the first or second move,
+        picks the same move as recursive minimax.
+        """
+        games = []
+        for value in [4, 18, 29, 40]:
+            with patch('builtins.input', return_value=str(value)):
+                games.append(SubtractSquareGame(True))
+        games.append(self.make_stonehenge_game(2, True, ['A', 'F', 'D']))
+        games.append(self.make_stonehenge_game(2, False, ['B']))
+
+        for game in games:
+            expected_move = minimax_recursive_strategy(game)
+            for split_depth in [1, 2]:
+                move_chosen = minimax_parallel_strategy(game, 2, split_depth)
+                self.assertEqual(move_chosen, expected_move,
+                                 ("Parallel minimax split at depth {} " +
+                                  "should return {} but returned {} for " +
+                                  "the state:\n{}").format(
+                                     split_depth, expected_move, move_chosen,
+                                     game.current_state))
+
+    def test_shared_table_between_processes(self):
+        """
+        Test that positions stored in a shared transposition table by worker
+        processes can be read back by every other process.
+        """
+        table = SharedTranspositionTable(1 << 12)
+        try:
+            with ProcessPoolExecutor(2) as executor:
+                list(executor.map(store_in_shared_table, [table] * 4,
+                                  [0, 100, 200, 300]))
+                found = list(executor.map(store_in_shared_table, [table] * 3,
+                                          [100, 200, 300]))
+            self.assertEqual(found, [100, 100, 100])
+            for key in range(400):
+                self.assertEqual(table.get(key), key % 3 - 1)
+        finally:
+            table.unlink()
+
+    def test_parallel_workers_abort(self):
+        """
+        Test that parallel minimax reuses its workers and their shared table
+        from move to move, and that it stops its workers and still picks a
+        move once its time runs out.
+        """
+        game = self.make_stonehenge_game(2, False, ['B'])
+        minimax_parallel_strategy(game, 2)
+        executor = get_executor(2)
+        shared = get_shared_table(2)
+        self.assertGreater(len(shared), 0)
+        minimax_parallel_strategy(game, 2)
+        self.assertIs(get_executor(2), executor)
+        self.assertIs(get_shared_table(2), shared)
+
+        try:
+            # A side-4 board cannot be searched in time, so this only
+            # returns once the workers have been stopped.
+            game = self.make_stonehenge_game(4, True, [])
+            move = minimax_parallel_strategy(game, 2, time_limit=0.1)
+            self.assertTrue(game.current_state.is_valid_move(move))
+            self.assertIs(get_executor(2), executor)
+        finally:
+            shutdown_executors()
+
+    def test_search_callback_gets_stats(self):
+        """
+        Test that a game with a search_callback gets the counters of every
+        move of every minimax strategy, which picks the same move in the
+        same number of states as it does without one.
+        """
+        for strategy in [minimax_recursive_strategy,
+                         minimax_iterative_strategy,
+                         minimax_recursive_alphabeta,
+                         minimax_iterative_alphabeta]:
+            games = []
+            for _ in range(2):
+                game = SubtractSquareGame(True, 30)
+                game.current_state = game.current_state.make_move(4)
+                games.append(game)
+            delivered = []
+            games[1].search_callback = delivered.append
+
+            move_chosen = strategy(games[0])
+            self.assertEqual(strategy(games[1]), move_chosen)
+            self.assertEqual(len(delivered), 1)
+            stats = delivered[0]
+            self.assertIs(stats, games[1].search_stats)
+            self.assertEqual(stats.nodes, games[0].search_stats.nodes)
+            self.assertEqual(games[0].search_stats.children, 0)
+            self.assertGreater(stats.leaves, 0)
+            self.assertGreater(stats.max_depth, 1)
+            self.assertGreater(stats.branching_factor, 1)
+            self.assertGreaterEqual(stats.elapsed, stats.make_move_time)
+
+    def test_search_callback_counts_only_the_search(self):
+        """
+        Test that the states made to tell symmetric moves apart are not
+        counted as children, and that a strategy which does not search is
+        not credited with the states of the search before it.
+        """
+        game = self.make_stonehenge_game(2, True, [])
+        delivered = []
+        game.search_callback = delivered.append
+        minimax_recursive_strategy(game)
+        stats = delivered[-1]
+        self.assertEqual(stats.children, stats.nodes)
+
+        usable_strategies['ro'](game)
+        self.assertIs(game.search_stats, delivered[-1])
+        self.assertEqual(delivered[-1].nodes, 0)
+        self.assertEqual(delivered[-1].children,
+                         len(game.current_state.get_possible_moves()))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,288 @@
+"""
+A minimax strategy that searches the moves from the root in parallel.
+
+Every root move (or, optionally, every reply to every root move) is scored by
+recursive_minimax_scores in a separate worker process. Only the game's class
+and a pickled snapshot of the state to search are sent to the workers, never
+the game itself, so the transposition table on the game is not copied.
+Instead, every worker reads and writes one SharedTranspositionTable, so a
+position solved by one worker is not searched again by the others.
+
+The worker processes are started once for each number of workers asked for,
+and kept for every later move until shutdown_executors() is called, which
+also happens when the program exits. So is the shared table of each pool,
+so positions solved for one move are still there for the next. Scores are
+stored for a player and a canonical key, so moves of different players and
+games can share a table. Each search shares one more word with its workers,
+which it sets once it no longer needs their scores, so that workers already
+searching stop at the next state they visit.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import atexit
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Tuple
+
+from game_state import GameState
+from strategy import SearchBudget, SearchStats, SearchTimeout, \
+    _start_search, distinct_moves, get_score, recursive_minimax_scores
+from transposition import DEFAULT_TABLE_SIZE, SharedTranspositionTable
+
+# the worker pools started so far and their shared tables, by their number
+# of workers
+_EXECUTORS: Dict[int, ProcessPoolExecutor] = {}
+_TABLES: Dict[int, SharedTranspositionTable] = {}
+
+# the shared table and abort word of the search this worker process last
+# worked for, by name
+_WORKER_TABLES = {}
+_WORKER_ABORTS = {}
+
+
+class AbortBudget(SearchBudget):
+    """ A budget without limits that runs out as soon as the search it was
+        given out for sets its abort word.
+    """
+    def __init__(self, abort: memoryview) -> None:
+        """ Initialize a budget that runs out once abort[0] is set.
+        """
+        super().__init__()
+        self._abort = abort
+
+    def spend(self, stats: SearchStats) -> None:
+        """ Count one more visited state in stats, raising SearchTimeout if
+            the search was aborted.
+        """
+        if self._abort[0]:
+            raise SearchTimeout
+        stats.nodes += 1
+
+
+def _attach(attached: dict, name: str, attach: Any) -> Any:
+    """
+    Return the shared block called name from attached, attaching to it with
+    attach if it is not there yet and letting go of the blocks of earlier
+    searches, which are finished or no longer used.
+    """
+    if name not in attached:
+        for block in attached.values():
+            block.close()
+        attached.clear()
+        attached[name] = attach(name=name)
+    return attached[name]
+
+
+def _search_state(game_type: type, state: GameState, player: str,
+                  table_name: str,
+                  abort_name: str) -> Tuple[Optional[int], int]:
+    """
+    Return the minimax score of state for player and the number of states
+    visited to find it, using the shared table called table_name, or None
+    for the score if the search was aborted through the shared word called
+    abort_name first. This runs in a worker process.
+    """
+    game = game_type.__new__(game_type)
+    game.current_state = state
+    table = _attach(_WORKER_TABLES, table_name, SharedTranspositionTable)
+    abort = _attach(_WORKER_ABORTS, abort_name, shared_memory.SharedMemory)
+    stats = SearchStats()
+    try:
+        score = recursive_minimax_scores(game, state, player, table, stats,
+                                         AbortBudget(abort.buf))
+    except SearchTimeout:
+        score = None
+    return score, stats.nodes
+
+
+def get_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Return the pool of max_workers worker processes (one per CPU by
+    default), starting it only the first time it is asked for.
+    """
+    workers = max_workers or os.cpu_count()
+    executor = _EXECUTORS.get(workers)
+    if executor is None:
+        executor = ProcessPoolExecutor(workers)
+        _EXECUTORS[workers] = executor
+    return executor
+
+
+def get_shared_table(max_workers: Optional[int] = None,
+                     table_size: int = DEFAULT_TABLE_SIZE) \
+        -> SharedTranspositionTable:
+    """
+    Return the shared table of the pool of max_workers worker processes,
+    with room for table_size positions, creating it only the first time it is
+    asked for or when table_size changes.
+    """
+    workers = max_workers or os.cpu_count()
+    table = _TABLES.get(workers)
+    slots = 1 << (table_size - 1).bit_length()
+    if table is None or table.slots != slots:
+        if table is not None:
+            table.unlink()
+        table = SharedTranspositionTable(table_size)
+        _TABLES[workers] = table
+    return table
+
+
+def shutdown_executors() -> None:
+    """
+    Stop every worker pool started by get_executor() and free the tables
+    returned by get_shared_table().
+    """
+    for executor in _EXECUTORS.values():
+        executor.shutdown(cancel_futures=True)
+    _EXECUTORS.clear()
+    for table in _TABLES.values():
+        table.unlink()
+    _TABLES.clear()
+
+
+atexit.register(shutdown_executors)
+
+
+def _combine(scores: list, maximizing: bool) -> int:
+    """
+    Return the score of a state whose children have scores, for the player
+    maximizing or minimizing at that state.
+
+    >>> _combine([-1, 1], True), _combine([-1, 1], False)
+    (1, -1)
+    """
+    return max(scores) if maximizing else min(scores)
+
+
+def parallel_minimax(game: Any, max_workers: Optional[int] = None,
+                     split_depth: int = 1,
+                     table_size: int = DEFAULT_TABLE_SIZE,
+                     time_limit: Optional[float] = None) -> Any:
+    """
+    Return the same move as recursive_minimax, scoring the root moves in up to
+    max_workers processes at once (one per CPU by default) that share a
+    transposition table of table_size positions, kept for later moves.
+
+    With a split_depth of 2, every reply to every root move is a separate
+    task instead, which keeps more workers busy when there are few root
+    moves. Once a move is known to be the one recursive_minimax would pick,
+    that is, a forced win with every earlier move scored, the tasks still
+    waiting are cancelled and those already running are aborted, and the
+    move is returned once the workers have all stopped.
+
+    If time_limit seconds pass first, the search is aborted the same way and
+    the best of the moves scored so far is returned, or the first move if
+    none has been.
+
+    The states searched for the moves up to the one returned are counted in
+    game.search_stats, but not those searched for later moves that happened
+    to be scored before the search was stopped, so that the count does not
+    depend on how fast the workers were told to stop.
+    """
+    state = game.current_state
+    player = state.get_current_player_name()
+    stats = _start_search(game)
+    moves = distinct_moves(state)
+    game_type = type(game)
+
+    # tasks[i] lists the futures for moves[i], with the score of moves[i]
+    # taken as the best of them for whoever moves after moves[i]
+    tasks = {}
+    scores: Dict[int, int] = {}
+    searched: Dict[int, int] = {}
+    maximizing = {}
+    budget = SearchBudget(time_limit)
+    table = get_shared_table(max_workers, table_size)
+    abort = shared_memory.SharedMemory(create=True, size=1)
+    abort.buf[0] = 0
+    executor = get_executor(max_workers)
+    try:
+        for index, move in enumerate(moves):
+            child = state.make_move(move)
+            if game.is_over(child):
+                stats.nodes += 1
+                scores[index] = get_score(game, child, player)
+            elif split_depth < 2:
+                tasks[index] = [executor.submit(_search_state, game_type,
+                                                child, player, table.name,
+                                                abort.name)]
+                maximizing[index] = True
+            else:
+                stats.nodes += 1
+                tasks[index] = [executor.submit(_search_state, game_type,
+                                                child.make_move(reply), player,
+                                                table.name, abort.name)
+                                for reply in child.get_possible_moves()]
+                maximizing[index] = child.get_current_player_name() == player
+
+        pending = {future for futures in tasks.values() for future in futures}
+        best = _settled_best(moves, scores)
+        while pending and best is None:
+            timeout = None
+            if budget.deadline is not None:
+                timeout = budget.deadline - time.monotonic()
+                if timeout <= 0:
+                    best = _best_so_far(scores)
+                    break
+            _, pending = wait(pending, timeout, FIRST_COMPLETED)
+            for index, futures in tasks.items():
+                if index not in scores and all(future.done()
+                                               for future in futures):
+                    results = [future.result() for future in futures]
+                    searched[index] = sum(nodes for _, nodes in results)
+                    scores[index] = _combine([score for score, _ in results],
+                                             maximizing[index])
+            best = _settled_best(moves, scores)
+    finally:
+        abort.buf[0] = 1
+        futures = [future for futures in tasks.values() for future in futures]
+        for future in futures:
+            future.cancel()
+        wait(futures)
+        abort.close()
+        abort.unlink()
+
+    if best is None:
+        return None
+    stats.nodes += sum(nodes for index, nodes in searched.items()
+                       if index <= best)
+    return moves[best]
+
+
+def _best_so_far(scores: Dict[int, int]) -> int:
+    """
+    Return the index of the move with the best of scores, the first of them
+    if several tie, or 0 if there are none.
+
+    >>> _best_so_far({2: GameState.DRAW, 1: GameState.DRAW}), _best_so_far({})
+    (1, 0)
+    """
+    return max(sorted(scores), key=scores.get, default=0)
+
+
+def _settled_best(moves: list, scores: Dict[int, int]) -> Optional[int]:
+    """
+    Return the index of the move recursive_minimax would pick if scores
+    already decide it, or None if some moves still have to be scored.
+
+    >>> _settled_best(['a', 'b', 'c'], {1: GameState.WIN, 0: GameState.LOSE})
+    1
+    >>> _settled_best(['a', 'b', 'c'], {1: GameState.WIN}) is None
+    True
+    """
+    best = None
+    for index in range(len(moves)):
+        if index not in scores:
+            return None
+        if best is None or scores[index] > scores[best]:
+            best = index
+        if scores[best] >= GameState.WIN:
+            return best
+    return best
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
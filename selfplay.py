@@ -0,0 +1,144 @@
+"""
+A headless runner that plays many games between two strategies.
+
+Unlike GameInterface, nothing is read from stdin and nothing is printed: the
+first player and the game's own settings (such as the count of
+SubtractSquare) are given up front, and the result of every game is written
+as one line of JSON as soon as it is finished:
+
+    {"game": 0, "p1_starts": true, "winner": "p1", "finished": true,
+     "moves": [...], "latencies": [...], "nodes": [...]}
+
+winner is "p1", "p2" or null for a game that was stopped after max_moves
+moves, latencies holds the seconds each move took its strategy and nodes the
+number of states it searched, or null for strategies that do not search.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Optional
+
+from transposition import DEFAULT_TABLE_SIZE, TranspositionTable
+
+DEFAULT_MAX_MOVES = 1000
+
+
+class SelfPlayRunner:
+    """
+    Plays games of one kind between two strategies without any input.
+
+    game_class - the class of game to play, e.g. SubtractSquareGame
+    p1_strategy - the strategy of Player 1
+    p2_strategy - the strategy of Player 2
+    p1_starts - whether Player 1 makes the first move
+    game_options - keyword arguments for game_class besides p1_starts
+    max_moves - the number of moves after which a game is stopped unfinished
+    table_size - the size of the transposition table given to each game
+    """
+    game_class: type
+    p1_strategy: Callable[[Any], Any]
+    p2_strategy: Callable[[Any], Any]
+    p1_starts: bool
+    game_options: Dict[str, Any]
+    max_moves: int
+    table_size: int
+
+    def __init__(self, game_class: type, p1_strategy: Callable[[Any], Any],
+                 p2_strategy: Callable[[Any], Any], p1_starts: bool = True,
+                 game_options: Optional[Dict[str, Any]] = None,
+                 max_moves: int = DEFAULT_MAX_MOVES,
+                 table_size: int = DEFAULT_TABLE_SIZE) -> None:
+        """
+        Initialize a runner for games of game_class between p1_strategy and
+        p2_strategy.
+        """
+        self.game_class = game_class
+        self.p1_strategy = p1_strategy
+        self.p2_strategy = p2_strategy
+        self.p1_starts = p1_starts
+        self.game_options = dict(game_options or {})
+        self.max_moves = max_moves
+        self.table_size = table_size
+
+    def play_game(self, index: int = 0) -> Dict[str, Any]:
+        """
+        Play one game and return its result, numbered index.
+
+        Raise ValueError if a strategy picks an invalid move.
+        """
+        game = self.game_class(self.p1_starts, **self.game_options)
+        game.transposition_table = TranspositionTable(self.table_size)
+        state = game.current_state
+        moves = []
+        latencies = []
+        nodes = []
+
+        while not game.is_over(state) and len(moves) < self.max_moves:
+            strategy = self.p1_strategy
+            if state.get_current_player_name() == 'p2':
+                strategy = self.p2_strategy
+            game.search_stats = None
+            start = time.perf_counter()
+            move = strategy(game)
+            latencies.append(time.perf_counter() - start)
+            stats = getattr(game, 'search_stats', None)
+            nodes.append(stats.nodes if stats is not None else None)
+            if not state.is_valid_move(move):
+                raise ValueError("{} picked the invalid move {!r} at:\n{}"
+                                 .format(getattr(strategy, '__name__',
+                                                 strategy), move, state))
+            moves.append(move)
+            state = state.make_move(move)
+            game.current_state = state
+
+        finished = game.is_over(state)
+        winner = None
+        if finished:
+            winner = 'p1' if game.is_winner('p1') else \
+                'p2' if game.is_winner('p2') else None
+        return {'game': index, 'p1_starts': self.p1_starts, 'winner': winner,
+                'finished': finished, 'moves': moves,
+                'latencies': latencies, 'nodes': nodes}
+
+    def run(self, count: int, path: str,
+            workers: int = 1) -> Dict[str, int]:
+        """
+        Play count games, in up to workers processes at once, appending the
+        result of each to the JSON Lines file at path as soon as it is known.
+        Return how many games each player won and how many had no winner.
+
+        With more than one worker, results are written in the order the
+        games finish, which their "game" numbers tell apart.
+
+        With more than one worker, the strategies and game class must be
+        picklable, i.e. defined at the top level of a module.
+        """
+        totals = {'p1': 0, 'p2': 0, 'none': 0}
+        with open(path, 'a') as output:
+            if workers > 1:
+                with ProcessPoolExecutor(workers) as executor:
+                    futures = [executor.submit(self.play_game, index)
+                               for index in range(count)]
+                    for future in as_completed(futures):
+                        _write_result(output, future.result(), totals)
+            else:
+                for index in range(count):
+                    _write_result(output, self.play_game(index), totals)
+        return totals
+
+
+def _write_result(output: Any, result: Dict[str, Any],
+                  totals: Dict[str, int]) -> None:
+    """
+    Write result as a line of JSON to output and count its winner in totals.
+    """
+    output.write(json.dumps(result, default=str) + '\n')
+    output.flush()
+    totals[result['winner'] or 'none'] += 1
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
@@ -0,0 +1,62 @@
+"""
+Unittests for the headless self-play runner.
+"""
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from game_interface import playable_games, usable_strategies
+from selfplay import SelfPlayRunner
+from unittest_helpers import use_own_solver_table
+SubtractSquareGame = playable_games['s']
+ChopsticksGame = playable_games['c']
+
+
+class SelfPlayUnitTests(unittest.TestCase):
+    def setUp(self):
+        use_own_solver_table(self)
+
+    def test_runner_writes_one_line_per_game(self):
+        """
+        Test that the runner plays without asking for input and writes the
+        winner, moves and move times of every game, in one or more
+        processes.
+        """
+        runner = SelfPlayRunner(SubtractSquareGame, usable_strategies['ss'],
+                                usable_strategies['mr'],
+                                game_options={'count': 18})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games.jsonl')
+            with patch('builtins.input', side_effect=AssertionError):
+                totals = runner.run(3, path)
+                totals_parallel = runner.run(2, path, workers=2)
+            with open(path) as results:
+                games = [json.loads(line) for line in results]
+
+        # 18 is a winning total, so the first player always wins.
+        self.assertEqual(totals, {'p1': 3, 'p2': 0, 'none': 0})
+        self.assertEqual(totals_parallel, {'p1': 2, 'p2': 0, 'none': 0})
+        self.assertEqual([game['game'] for game in games[:3]], [0, 1, 2])
+        self.assertEqual(sorted(game['game'] for game in games[3:]), [0, 1])
+        for game in games:
+            self.assertEqual(sum(game['moves']), 18)
+            self.assertEqual(len(game['latencies']), len(game['moves']))
+            self.assertEqual(len(game['nodes']), len(game['moves']))
+
+    def test_runner_stops_endless_games(self):
+        """
+        Test that a game of Chopsticks between two solvers, which is a draw,
+        is stopped after max_moves moves.
+        """
+        runner = SelfPlayRunner(ChopsticksGame, usable_strategies['cs'],
+                                usable_strategies['cs'], max_moves=50)
+        result = runner.play_game()
+        self.assertFalse(result['finished'])
+        self.assertIsNone(result['winner'])
+        self.assertEqual(len(result['moves']), 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
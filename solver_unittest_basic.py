@@ -0,0 +1,266 @@
+"""
+Unittests for the precomputed solvers.
+
+These check that each solver agrees with minimax on positions small enough
+for minimax to finish quickly.
+"""
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+from game_interface import playable_games, unusable_strategies, \
+    usable_strategies
+from subtract_square_solver import MIN_TOTALS, SubtractSquareSolver
+from chopsticks_solver import get_solution, reachable_states
+from chopsticks import ChopsticksGameState
+from stonehenge_book import build_book, book_strategy, get_book, \
+    OpeningBook
+from game_state import GameState
+from unittest_helpers import use_own_solver_table
+SubtractSquareGame = playable_games['s']
+ChopsticksGame = playable_games['c']
+StonehengeGame = playable_games['h']
+minimax_recursive_strategy = usable_strategies['mr']
+subtract_square_solver_strategy = usable_strategies['ss']
+chopsticks_solver_strategy = usable_strategies['cs']
+
+
+def _solve_in_file(path, total):
+    """
+    Return the totals solved by a new solver on the file at path once total
+    is solved.
+    """
+    solver = SubtractSquareSolver(path)
+    solver.ensure(total)
+    totals = solver.totals
+    solver.close()
+    return totals
+
+
+class SubtractSquareSolverUnitTests(unittest.TestCase):
+    def setUp(self):
+        use_own_solver_table(self)
+
+    def test_solver_matches_minimax(self):
+        """
+        Test that the solver strategy picks the same move as recursive
+        minimax for every total up to 200.
+        """
+        for value in range(1, 201):
+            with patch('builtins.input', return_value=str(value)):
+                game = SubtractSquareGame(True)
+            expected_move = minimax_recursive_strategy(game)
+            move_chosen = subtract_square_solver_strategy(game)
+            self.assertEqual(move_chosen, expected_move,
+                             ("The solver on a game of SubtractSquare with " +
+                              "a value of {} should return {} but returned " +
+                              "{} instead.").format(value, expected_move,
+                                                    move_chosen))
+
+    def test_solver_table_persists_and_grows(self):
+        """
+        Test that a table written to a file is read back by a new solver and
+        still grows when a larger total is asked for.
+        """
+        in_memory = SubtractSquareSolver()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table.bin')
+            solver = SubtractSquareSolver(path)
+            solver.ensure(1000)
+            totals = solver.totals
+            solver.close()
+
+            solver = SubtractSquareSolver(path)
+            self.assertEqual(solver.totals, totals,
+                             "A new solver should read back the totals " +
+                             "already solved in its file.")
+            solver.ensure(totals * 3)
+            self.assertTrue(solver.totals > totals * 3)
+            for total in range(0, solver.totals, 97):
+                self.assertEqual(solver.is_winning(total),
+                                 in_memory.is_winning(total),
+                                 "Total {} was solved wrongly.".format(total))
+            solver.close()
+
+    def test_solvers_share_a_file(self):
+        """
+        Test that solvers sharing a file, in this process and in others,
+        never shrink it and each see the totals the others solved.
+        """
+        in_memory = SubtractSquareSolver()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table.bin')
+            small = SubtractSquareSolver(path)
+            small.ensure(10)
+            large = SubtractSquareSolver(path)
+            large.ensure(MIN_TOTALS * 4)
+            size = os.path.getsize(path)
+
+            # small still has the first map it made, and growing it must
+            # neither shrink the file nor redo what large solved
+            small.ensure(MIN_TOTALS * 2)
+            self.assertEqual(os.path.getsize(path), size)
+            self.assertEqual(small.totals, large.totals)
+            self.assertEqual(large.is_winning(MIN_TOTALS * 3),
+                             in_memory.is_winning(MIN_TOTALS * 3))
+
+            with ProcessPoolExecutor(2) as pool:
+                totals = list(pool.map(_solve_in_file,
+                                       [path] * 4,
+                                       [MIN_TOTALS * 5, MIN_TOTALS * 9,
+                                        MIN_TOTALS * 6, MIN_TOTALS * 12]))
+            self.assertGreater(totals[-1], MIN_TOTALS * 12)
+            self.assertGreater(os.path.getsize(path), size)
+            for total in range(0, MIN_TOTALS * 12, 997):
+                self.assertEqual(small.is_winning(total),
+                                 in_memory.is_winning(total),
+                                 "Total {} was solved wrongly.".format(total))
+            small.close()
+            large.close()
+
+    def test_solver_leaves_other_files_alone(self):
+        """
+        Test that a solver refuses a file that is not a table, and a symbolic
+        link, without writing to either.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'notes.txt')
+            with open(path, 'w') as other_file:
+                other_file.write('not a table')
+            self.assertRaises(ValueError, SubtractSquareSolver, path)
+            with open(path) as other_file:
+                self.assertEqual(other_file.read(), 'not a table')
+
+            link = os.path.join(directory, 'table.bin')
+            os.symlink(os.path.join(directory, 'elsewhere.bin'), link)
+            solver = SubtractSquareSolver(link)
+            self.assertRaises(OSError, solver.ensure, 10)
+            self.assertFalse(os.path.exists(os.path.join(directory,
+                                                         'elsewhere.bin')))
+
+
+class ChopsticksSolverUnitTests(unittest.TestCase):
+    def test_solver_wins_from_winning_states(self):
+        """
+        Test that when both players follow the solver from a state labelled
+        as a win, the player to move wins in exactly the predicted number of
+        moves.
+        """
+        game = ChopsticksGame(True)
+        states = reachable_states(game)
+        for key, (outcome, depth, _) in get_solution().items():
+            if outcome != GameState.WIN:
+                continue
+            state = states[key]
+            game.current_state = ChopsticksGameState(
+                state.player, state.get_hands_copy())
+            player = game.current_state.get_current_player_name()
+
+            moves = 0
+            while not game.is_over(game.current_state):
+                move = chopsticks_solver_strategy(game)
+                game.current_state = game.current_state.make_move(move)
+                moves += 1
+            self.assertTrue(game.is_winner(player),
+                            "{} should win from {}.".format(player, key))
+            self.assertEqual(moves, depth,
+                             ("The game from {} should last {} moves " +
+                              "but lasted {}.").format(key, depth, moves))
+
+    def test_offered_strategies_finish(self):
+        """
+        Test that every strategy offered for Chopsticks, besides the
+        interactive one, picks a valid move.
+        """
+        game = ChopsticksGame(True)
+        for key, strategy in usable_strategies.items():
+            if key == 'i' or key in unusable_strategies['c']:
+                continue
+            self.assertTrue(game.current_state.is_valid_move(strategy(game)),
+                            "'{}' picked an invalid move.".format(key))
+
+    def test_solver_rejects_unreachable_states(self):
+        """
+        Test that the solver raises ValueError for a state that no game of
+        Chopsticks reaches.
+        """
+        game = ChopsticksGame(True)
+        game.current_state = ChopsticksGameState(
+            'p1', {'p1': {'l': 1, 'r': 1}, 'p2': {'l': 0, 'r': 0}})
+        self.assertRaises(ValueError, chopsticks_solver_strategy, game)
+
+
+class StonehengeBookUnitTests(unittest.TestCase):
+    def test_book_moves_match_minimax(self):
+        """
+        Test that a book built for small boards gives the move of recursive
+        minimax for the positions in it, and falls back to the given
+        strategy for the others.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.bin')
+            count = build_book(path, [1, 2], 2)
+            book = OpeningBook(path)
+            self.assertEqual(book.size, count)
+
+            fallback_calls = []
+
+            def fallback(game):
+                fallback_calls.append(game)
+                return minimax_recursive_strategy(game)
+            strategy = book_strategy(fallback, path)
+
+            for side_length, moves_to_make in [(1, []), (2, ['A']),
+                                               (2, ['B', 'G']),
+                                               (2, ['A', 'F', 'D'])]:
+                with patch('builtins.input', return_value=str(side_length)):
+                    game = StonehengeGame(True)
+                for move in moves_to_make:
+                    game.current_state = game.current_state.make_move(
+                        game.str_to_move(move))
+                in_book = book.lookup(game.current_state) is not None
+                self.assertEqual(in_book, len(moves_to_make) <= 2)
+                calls = len(fallback_calls)
+                self.assertEqual(strategy(game),
+                                 minimax_recursive_strategy(game))
+                self.assertEqual(len(fallback_calls) - calls, 0 if in_book
+                                 else 1)
+            book.close()
+
+    def test_rebuilt_book_is_reopened(self):
+        """
+        Test that rebuilding a book leaves a book already opened from it
+        readable, and that get_book opens the new one.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.bin')
+            self.assertEqual(get_book(path).size, 0)
+            count = build_book(path, [1], 1)
+            book = get_book(path)
+            self.assertEqual(book.size, count)
+
+            old = OpeningBook(path)
+            with patch('builtins.input', return_value='1'):
+                game = StonehengeGame(True)
+            move = old.lookup(game.current_state)
+            build_book(path, [1, 2], 2)
+            self.assertEqual(old.lookup(game.current_state), move)
+            self.assertGreater(get_book(path).size, count)
+            self.assertEqual(os.listdir(directory), ['book.bin'])
+            old.close()
+            get_book(path).close()
+
+    def test_unsolvable_boards_rejected(self):
+        """
+        Test that no book is written for boards too large to solve exactly.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'book.bin')
+            self.assertRaises(ValueError, build_book, path, [1, 4], 0)
+            self.assertEqual(os.listdir(directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,15 +2,22 @@
 """
 import pprint
 import string
-from typing import List, Dict, Set
+from itertools import permutations, product
+from typing import Any, List, Dict, Optional, Tuple
 
+from game import Game
 from game_state import GameState
+from zobrist import TURN_KEY, make_keys
 
 NOT_USED = 'x'
 P1_CLAIMED = '1'
 P2_CLAIMED = '2'
 NOT_CLAIMED = '@'
 
+# Bits given to each ley-line in the packed per-line cell counts
+COUNT_WIDTH = 8
+COUNT_MASK = (1 << COUNT_WIDTH) - 1
+
 
 def indent(line, count) -> str:
     """ Helper function for the str method. Adds
@@ -96,50 +103,64 @@ def add_to_line(nodes: List[List[str]], x: int,
     line.append(nodes[x][y])
 
 
-def get_claimer(line: List[str]) -> str:
-    """ Helper function to keep track of claimers (1 or 2)
-    """
-    counter = {P1_CLAIMED: 0, P2_CLAIMED: 0}
-    for cell in line:
-        if cell in counter:
-            counter[cell] += 1
-    max_player = get_max_by_value(counter)
-    if max_player != NOT_CLAIMED and counter[max_player] >= len(line) / 2:
-        return max_player
-    return NOT_CLAIMED
-
+def get_claimer(p1_count: int, p2_count: int, line_size: int) -> str:
+    """ Return who claims a line of line_size cells in which the players
+    have taken p1_count and p2_count cells, or NOT_CLAIMED if nobody does.
 
-def get_max_by_value(counter: Dict[str, int]) -> str:
-    """ Comapare claimers to see which line is claimed by who
+    >>> get_claimer(1, 0, 2)
+    '1'
+    >>> get_claimer(1, 1, 3)
+    '@'
+    >>> get_claimer(0, 2, 4)
+    '2'
     """
-    if counter[P1_CLAIMED] > counter[P2_CLAIMED]:
+    if p1_count > p2_count and p1_count * 2 >= line_size:
         return P1_CLAIMED
-    elif counter[P2_CLAIMED] > counter[P1_CLAIMED]:
+    if p2_count > p1_count and p2_count * 2 >= line_size:
         return P2_CLAIMED
     return NOT_CLAIMED
 
 
-def get_cell_sets(line: List[str]) -> Set[str]:
-    """ Get the uncliamed cells in a line
-    """
-    return set([cell for cell in line if cell
-                not in [P1_CLAIMED, P2_CLAIMED, NOT_USED]])
-
+def index_to_label(index: int) -> str:
+    """ Return the label of the cell numbered index: A to Z, then AA to AZ,
+    BA to BZ and so on, like the columns of a spreadsheet.
 
-def get_update_lines(claim_marks: List[str], lines: List[List[str]]) -> list:
-    """ Get updated row
+    >>> [index_to_label(index) for index in [0, 25, 26, 27, 52, 702]]
+    ['A', 'Z', 'AA', 'AB', 'BA', 'AAA']
     """
-    updated = list(claim_marks)
-    for i in range(len(lines)):
-        if updated[i] == NOT_CLAIMED and get_claimer(lines[i]) != NOT_CLAIMED:
-            updated[i] = get_claimer(lines[i])
+    label = ''
+    index += 1
+    while index > 0:
+        index, digit = divmod(index - 1, 26)
+        label = string.ascii_uppercase[digit] + label
+    return label
+
+
+def label_to_index(label: str) -> int:
+    """ Return the number of the cell labelled label, or -1 if label is not
+    a cell label.
+
+    >>> [label_to_index(label) for label in ['A', 'Z', 'AA', 'BA', 'AAA']]
+    [0, 25, 26, 52, 702]
+    >>> label_to_index('A1')
+    -1
+    """
+    if not label:
+        return -1
+    index = 0
+    for letter in label:
+        digit = string.ascii_uppercase.find(letter)
+        if digit < 0:
+            return -1
+        index = index * 26 + digit + 1
+    return index - 1
 
-    return updated
 
+def create_start_nodes(side_length: int) -> List[List[str]]:
+    """ Generate the lettered grid of a new board from side_length
 
-def create_start_henge_state(is_p1_turn: bool,
-                             side_length: int) -> 'StoneHengeState':
-    """ Generate the grid from side_length
+    >>> create_start_nodes(1)
+    [['A', 'B'], ['C', 'x']]
     """
     size = side_length + 1
     nodes = [[''] * size for _ in range(size)]
@@ -156,21 +177,433 @@ def create_start_henge_state(is_p1_turn: bool,
     for i in range(size):
         for j in range(size):
             if nodes[i][j] != NOT_USED:
-                nodes[i][j] = string.ascii_uppercase[index]
+                nodes[i][j] = index_to_label(index)
                 index += 1
+    return nodes
+
+
+def find_symmetries(cell_lines: List[tuple],
+                    size: int) -> List[Tuple[List[int], List[int]]]:
+    """ Return the symmetries of a board whose cells lie on the ley-lines in
+    cell_lines, with size ley-lines in each of the three directions.
+
+    Each cell is on one ley-line of each direction, so it is found by its
+    position along each direction. A symmetry may swap the directions and
+    reverse any of them, as long as every cell lands on a cell. It is
+    returned as the cell each cell moves to and the ley-line each ley-line
+    moves to; the identity comes first.
+
+    >>> symmetries = find_symmetries([(0, 2, 4), (0, 3, 5), (1, 3, 4)], 2)
+    >>> len(symmetries), symmetries[0]
+    (6, ([0, 1, 2], [0, 1, 2, 3, 4, 5]))
+    """
+    positions = [tuple(line - direction * size
+                       for direction, line in enumerate(lines))
+                 for lines in cell_lines]
+    cell_at = {position: cell for cell, position in enumerate(positions)}
+    symmetries = []
+    for order in permutations(range(3)):
+        for flips in product([False, True], repeat=3):
+            def move(direction: int, index: int) -> int:
+                """ Return where the ley-line index of direction moves to.
+                """
+                if flips[direction]:
+                    index = size - 1 - index
+                return order[direction] * size + index
+
+            cell_map = []
+            for position in positions:
+                moved = [0] * 3
+                for direction, index in enumerate(position):
+                    moved[order[direction]] = move(direction, index) \
+                        - order[direction] * size
+                cell_map.append(cell_at.get(tuple(moved)))
+            if None not in cell_map:
+                line_map = [move(line // size, line % size)
+                            for line in range(3 * size)]
+                symmetries.append((cell_map, line_map))
+    return symmetries
+
+
+class HengeLayout:
+    """ The fixed geometry of a Stonehenge board with a given side length.
+
+    Cells are numbered 0, 1, ... from left to right and top to bottom, and
+    labelled by index_to_label, and ley-lines are numbered rows first, then
+    down-left lines, then down-right lines, in the order their claimers are
+    printed.
+
+    side_length - the side length of the board
+    size - the width of the grid holding the board
+    labels - the label of each cell, by cell number
+    cell_of - the cell number of each label
+    label_width - the odd number of characters every cell is printed in
+    coords - the (row, column) grid position of each cell, by cell number
+    line_masks - the cells on each ley-line, as a bitmask of cell numbers
+    line_sizes - the number of cells on each ley-line
+    cell_lines - the three ley-lines through each cell, by cell number
+    count_steps - by cell number, the amount to add to a packed count of
+                  cells per ley-line when that cell is taken
+    all_cells - a bitmask of every cell on the board
+    cell_keys - by player ('p1' or 'p2') and cell number, the Zobrist key of
+                that player taking that cell
+    line_keys - by player and ley-line number, the Zobrist key of that
+                player claiming that ley-line
+    symmetries - the rotations and reflections of the board, as pairs of the
+                 cell each cell moves to and the ley-line each ley-line moves
+                 to, starting with the identity
+    """
+    side_length: int
+    size: int
+    labels: List[str]
+    cell_of: Dict[str, int]
+    label_width: int
+    coords: List[tuple]
+    line_masks: List[int]
+    line_sizes: List[int]
+    cell_lines: List[tuple]
+    count_steps: List[int]
+    all_cells: int
+    cell_keys: Dict[str, List[int]]
+    line_keys: Dict[str, List[int]]
+    symmetries: List[Tuple[List[int], List[int]]]
+
+    def __init__(self, side_length: int) -> None:
+        """ Compute the layout of a board with side_length.
+
+        >>> layout = HengeLayout(1)
+        >>> layout.labels, layout.coords
+        (['A', 'B', 'C'], [(0, 0), (0, 1), (1, 0)])
+        >>> layout.line_sizes
+        [2, 1, 1, 2, 2, 1]
+        >>> layout.cell_lines
+        [(0, 2, 4), (0, 3, 5), (1, 3, 4)]
+        """
+        nodes = create_start_nodes(side_length)
+        self.side_length = side_length
+        self.size = len(nodes)
+        self.labels = []
+        self.coords = []
+        for i in range(self.size):
+            for j in range(self.size):
+                if nodes[i][j] != NOT_USED:
+                    self.labels.append(nodes[i][j])
+                    self.coords.append((i, j))
+        self.cell_of = {label: cell for cell, label in enumerate(self.labels)}
+        self.label_width = max(len(label) for label in self.labels) | 1
+        self.all_cells = (1 << len(self.labels)) - 1
+
+        lines = get_row_lines(nodes) + get_down_left_lines(nodes) \
+            + get_down_right_lines(nodes)
+        self.line_masks = [sum(1 << self.cell_of[label] for label in line)
+                           for line in lines]
+        self.line_sizes = [len(line) for line in lines]
+        self.cell_lines = [tuple(line for line, mask
+                                 in enumerate(self.line_masks)
+                                 if mask >> cell & 1)
+                           for cell in range(len(self.labels))]
+        self.count_steps = [sum(1 << (COUNT_WIDTH * line) for line in lines)
+                            for lines in self.cell_lines]
+
+        cell_count, line_count = len(self.labels), len(lines)
+        keys = make_keys('stonehenge {}'.format(side_length),
+                         2 * (cell_count + line_count))
+        self.cell_keys = {'p1': keys[:cell_count],
+                          'p2': keys[cell_count:2 * cell_count]}
+        self.line_keys = {'p1': keys[2 * cell_count:
+                                     2 * cell_count + line_count],
+                          'p2': keys[2 * cell_count + line_count:]}
+
+        self.symmetries = find_symmetries(self.cell_lines, self.size)
+        self._cell_deltas = {
+            player: [tuple(TURN_KEY ^ self.cell_keys[player][cell_map[cell]]
+                           for cell_map, _ in self.symmetries)
+                     for cell in range(cell_count)]
+            for player in self.cell_keys}
+        self._line_deltas = {
+            player: [tuple(self.line_keys[player][line_map[line]]
+                           for _, line_map in self.symmetries)
+                     for line in range(line_count)]
+            for player in self.line_keys}
+
+    def zobrist(self, p1_turn: bool, p1_cells: int, p2_cells: int,
+                p1_lines: int, p2_lines: int, symmetry: int = 0) -> int:
+        """ Return the Zobrist hash of the board with the given turn and
+        bitboards, after it is transformed by symmetries[symmetry].
+
+        >>> layout = HengeLayout(1)
+        >>> layout.zobrist(False, 1, 0, 0, 0) == layout.cell_keys['p1'][0]
+        True
+        >>> layout.zobrist(False, 1, 0, 0, 0, 5) == \
+        layout.cell_keys['p1'][layout.symmetries[5][0][0]]
+        True
+        """
+        cell_map, line_map = self.symmetries[symmetry]
+        code = TURN_KEY if p1_turn else 0
+        for player, cells, lines in [('p1', p1_cells, p1_lines),
+                                     ('p2', p2_cells, p2_lines)]:
+            cell_keys = self.cell_keys[player]
+            for cell, moved in enumerate(cell_map):
+                if cells >> cell & 1:
+                    code ^= cell_keys[moved]
+            line_keys = self.line_keys[player]
+            for line, moved in enumerate(line_map):
+                if lines >> line & 1:
+                    code ^= line_keys[moved]
+        return code
+
+    def move_keys(self, player: str, cell: int, new_claims: int) -> tuple:
+        """ Return what the Zobrist hash under each symmetry changes by, XOR,
+        when player takes cell and claims the ley-lines in new_claims.
+
+        >>> layout = HengeLayout(1)
+        >>> layout.move_keys('p1', 0, 0b1)[0] == layout.zobrist(False, 1, 0, \
+        1, 0) ^ layout.zobrist(True, 0, 0, 0, 0)
+        True
+        """
+        keys = self._cell_deltas[player][cell]
+        if new_claims:
+            line_deltas = self._line_deltas[player]
+            for line in self.cell_lines[cell]:
+                if new_claims >> line & 1:
+                    keys = tuple(key ^ delta for key, delta
+                                 in zip(keys, line_deltas[line]))
+        return keys
+
+    def transform(self, bits: int, symmetry: int, of_lines: bool) -> int:
+        """ Return the cells (or ley-lines, if of_lines) in bits moved by
+        symmetries[symmetry].
+
+        >>> layout = HengeLayout(1)
+        >>> [layout.transform(0b001, symmetry, False) for symmetry in \
+        range(len(layout.symmetries))]
+        [1, 2, 4, 2, 4, 1]
+        """
+        mapping = self.symmetries[symmetry][1 if of_lines else 0]
+        moved = 0
+        for index, image in enumerate(mapping):
+            if bits >> index & 1:
+                moved |= 1 << image
+        return moved
+
+    def pack_counts(self, cells: int) -> int:
+        """ Return the number of cells of cells on each ley-line, packed
+        COUNT_WIDTH bits per line.
+
+        >>> layout = HengeLayout(1)
+        >>> layout.pack_counts(0b001) == layout.count_steps[0]
+        True
+        """
+        counts = 0
+        for cell, step in enumerate(self.count_steps):
+            if cells >> cell & 1:
+                counts += step
+        return counts
+
+
+_LAYOUTS = {}
+
+
+def get_layout(side_length: int) -> HengeLayout:
+    """ Return the layout of a board with side_length, computing it only the
+    first time it is asked for.
+
+    >>> get_layout(2) is get_layout(2)
+    True
+    """
+    layout = _LAYOUTS.get(side_length)
+    if layout is None:
+        layout = HengeLayout(side_length)
+        _LAYOUTS[side_length] = layout
+    return layout
+
+
+def count_bits(bits: int) -> int:
+    """ Return the number of set bits in bits.
+
+    >>> count_bits(0b1011)
+    3
+    """
+    return bin(bits).count('1')
+
+
+def _cells_of(bits: int) -> List[int]:
+    """ Return the numbers of the set bits of bits, lowest first.
+
+    >>> _cells_of(0b1011)
+    [0, 1, 3]
+    """
+    cells = []
+    while bits:
+        low = bits & -bits
+        cells.append(low.bit_length() - 1)
+        bits ^= low
+    return cells
+
+
+def get_winner_by_claims(p1_claims: int, p2_claims: int,
+                         line_count: int) -> Optional[str]:
+    """ Return the winner of a board with line_count ley-lines of which the
+    players have claimed p1_claims and p2_claims, or None if nobody has won.
+
+    >>> get_winner_by_claims(3, 1, 6)
+    'p1'
+    >>> get_winner_by_claims(3, 3, 6) is None
+    True
+    """
+    half = line_count / 2
+    # tie
+    if p1_claims == p2_claims and p1_claims == half:
+        return None
+    # p1 win
+    elif p1_claims >= half:
+        return 'p1'
+    # p2 win
+    elif p2_claims >= half:
+        return 'p2'
+    # game is not over
+    return None
+
+
+class RoughOutcomeCost:
+    """ What the rough outcomes of StoneHengeStates have cost so far.
+
+    === Attributes ===
+    evaluations - the rough outcomes worked out by looking ahead
+    memo_hits - the rough outcomes found in the memo instead
+    cells_checked - the cells tried as a winning move while looking ahead
+    """
+    evaluations: int
+    memo_hits: int
+    cells_checked: int
+
+    def __init__(self) -> None:
+        """ Initialize all counters to zero.
+        """
+        self.reset()
 
-    return StoneHengeState(is_p1_turn, nodes,
-                           [NOT_CLAIMED] * size, [NOT_CLAIMED] * size,
-                           [NOT_CLAIMED] * size)
+    def reset(self) -> None:
+        """ Set all counters back to zero.
+
+        >>> cost = RoughOutcomeCost()
+        >>> cost.evaluations = 3
+        >>> cost.reset()
+        >>> cost.evaluations
+        0
+        """
+        self.evaluations = 0
+        self.memo_hits = 0
+        self.cells_checked = 0
+
+
+rough_outcome_cost = RoughOutcomeCost()
+
+# The rough outcome of each state seen, by side length and canonical key;
+# it is emptied whenever it holds ROUGH_OUTCOME_MEMO_SIZE of them, so it
+# never grows past that however many games are played.
+ROUGH_OUTCOME_MEMO_SIZE = 1 << 16
+_ROUGH_OUTCOMES = {}
+
+
+def clear_rough_outcomes() -> None:
+    """ Forget every rough outcome remembered so far and reset
+    rough_outcome_cost, so that the next rough outcomes are all worked out
+    again and counted from zero.
+
+    >>> s = create_start_henge_state(True, 1)
+    >>> _ = s.rough_outcome()
+    >>> clear_rough_outcomes()
+    >>> _ = s.rough_outcome()
+    >>> rough_outcome_cost.evaluations, rough_outcome_cost.memo_hits
+    (1, 0)
+    """
+    _ROUGH_OUTCOMES.clear()
+    rough_outcome_cost.reset()
+
+
+# The most ley-lines a single cell is on: its row and two diagonals
+LINES_PER_CELL = 3
+
+_START_STATES = {}
+
+
+def create_start_henge_state(is_p1_turn: bool,
+                             side_length: int) -> 'StoneHengeState':
+    """ Generate the starting state of a board from side_length
+
+    The start of each board is built only the first time it is asked for,
+    and copied after that.
+
+    >>> create_start_henge_state(True, 1).get_possible_moves()
+    ['A', 'B', 'C']
+    >>> create_start_henge_state(True, 1).push('A')
+    >>> create_start_henge_state(True, 1).get_possible_moves()
+    ['A', 'B', 'C']
+    """
+    template = _START_STATES.get((is_p1_turn, side_length))
+    if template is None:
+        template = StoneHengeState.from_bits(get_layout(side_length),
+                                             is_p1_turn, 0, 0, 0, 0)
+        _START_STATES[(is_p1_turn, side_length)] = template
+    return template._copy()
+
+
+def restore_henge_state(is_p1_turn: bool, side_length: int, p1_cells: int,
+                        p2_cells: int, p1_lines: int,
+                        p2_lines: int) -> 'StoneHengeState':
+    """ Rebuild a state pickled by StoneHengeState.__reduce__
+
+    >>> restore_henge_state(True, 1, 1, 0, 0, 0).get_possible_moves()
+    ['B', 'C']
+    """
+    return StoneHengeState.from_bits(get_layout(side_length), is_p1_turn,
+                                     p1_cells, p2_cells, p1_lines, p2_lines)
 
 
 class StoneHengeState(GameState):
     """ Gamestate for stonehenge game
+
+    The board is stored as bitboards: bit k of p1_cells (p2_cells) is set when
+    cell k was taken by Player 1 (Player 2), and bit k of p1_lines (p2_lines)
+    is set when ley-line k was claimed by Player 1 (Player 2). p1_counts
+    (p2_counts) holds the number of cells each player has on every ley-line,
+    packed COUNT_WIDTH bits per line, so a move only updates its own lines.
+    The number of ley-lines each player claimed, the resulting winner and a
+    Zobrist hash of the state are kept up to date with every move, so
+    checking them is O(1).
+
+    States are hashable and compare equal when they have the same board,
+    claimers and current player. make_move leaves a state unchanged; push and
+    pop change it in place for searches that visit many states.
+
+    layout - the geometry of the board
+    p1_claims - the number of ley-lines claimed by Player 1
+    p2_claims - the number of ley-lines claimed by Player 2
+    winner - 'p1' or 'p2' if that player has won, None otherwise
+    hashes - the Zobrist hash of the board and the current player after
+             each of the layout's symmetries; hashes[0] is that of the
+             board itself
     """
+    __slots__ = ('layout', 'p1_cells', 'p2_cells', 'p1_lines', 'p2_lines',
+                 'p1_counts', 'p2_counts', 'p1_claims', 'p2_claims', 'winner',
+                 'hashes', '_pushed')
+
     WIN: int = 1
     LOSE: int = -1
     DRAW: int = 0
+    SUPPORTS_PUSH: bool = True
     p1_turn: bool
+    layout: HengeLayout
+    p1_cells: int
+    p2_cells: int
+    p1_lines: int
+    p2_lines: int
+    p1_counts: int
+    p2_counts: int
+    p1_claims: int
+    p2_claims: int
+    winner: Optional[str]
+    hashes: Tuple[int, ...]
 
     def __init__(self, is_p1_turn: bool, nodes: List[List[str]],
                  row_line_claimers: List[str], left_line_claimers: List[str],
@@ -185,10 +618,123 @@ class StoneHengeState(GameState):
         [['x', 'A', 'B'], ['C', 'D', 'E'], ['F', 'G', 'x']]
         """
         super().__init__(is_p1_turn)
-        self.nodes = nodes
-        self.row_line_claimers = row_line_claimers
-        self.left_line_claimers = left_line_claimers
-        self.right_line_claimers = right_line_claimers
+        layout = get_layout(len(nodes) - 1)
+        p1_cells = p2_cells = 0
+        for cell, (i, j) in enumerate(layout.coords):
+            if nodes[i][j] == P1_CLAIMED:
+                p1_cells |= 1 << cell
+            elif nodes[i][j] == P2_CLAIMED:
+                p2_cells |= 1 << cell
+
+        claimers = row_line_claimers + left_line_claimers \
+            + right_line_claimers
+        self._set_bits(layout, p1_cells, p2_cells,
+                       sum(1 << line for line, claimer in enumerate(claimers)
+                           if claimer == P1_CLAIMED),
+                       sum(1 << line for line, claimer in enumerate(claimers)
+                           if claimer == P2_CLAIMED))
+
+    @classmethod
+    def from_bits(cls, layout: HengeLayout, is_p1_turn: bool, p1_cells: int,
+                  p2_cells: int, p1_lines: int,
+                  p2_lines: int) -> 'StoneHengeState':
+        """ Return the state with the given layout and bitboards.
+
+        >>> s = StoneHengeState.from_bits(get_layout(1), False, 1, 0, 0, 0)
+        >>> s.nodes
+        [['1', 'B'], ['C', 'x']]
+        """
+        state = cls.__new__(cls)
+        state.p1_turn = is_p1_turn
+        state._set_bits(layout, p1_cells, p2_cells, p1_lines, p2_lines)
+        return state
+
+    def _set_bits(self, layout: HengeLayout, p1_cells: int, p2_cells: int,
+                  p1_lines: int, p2_lines: int) -> None:
+        """ Set the board of this state and everything derived from it.
+        """
+        self.layout = layout
+        self.p1_cells = p1_cells
+        self.p2_cells = p2_cells
+        self.p1_lines = p1_lines
+        self.p2_lines = p2_lines
+        self.p1_counts = layout.pack_counts(p1_cells)
+        self.p2_counts = layout.pack_counts(p2_cells)
+        self.p1_claims = count_bits(p1_lines)
+        self.p2_claims = count_bits(p2_lines)
+        self.winner = get_winner_by_claims(self.p1_claims, self.p2_claims,
+                                           len(layout.line_masks))
+        self.hashes = tuple(layout.zobrist(self.p1_turn, p1_cells, p2_cells,
+                                           p1_lines, p2_lines, symmetry)
+                            for symmetry in range(len(layout.symmetries)))
+        self._pushed = None
+
+    def _copy(self) -> 'StoneHengeState':
+        """ Return a copy of this state that can be changed in place.
+        """
+        state = StoneHengeState.__new__(StoneHengeState)
+        state.p1_turn = self.p1_turn
+        state.layout = self.layout
+        state.p1_cells = self.p1_cells
+        state.p2_cells = self.p2_cells
+        state.p1_lines = self.p1_lines
+        state.p2_lines = self.p2_lines
+        state.p1_counts = self.p1_counts
+        state.p2_counts = self.p2_counts
+        state.p1_claims = self.p1_claims
+        state.p2_claims = self.p2_claims
+        state.winner = self.winner
+        state.hashes = self.hashes
+        state._pushed = None
+        return state
+
+    @property
+    def nodes(self) -> List[List[str]]:
+        """ The board as a grid of labels, claimed cells and NOT_USED cells.
+        """
+        layout = self.layout
+        nodes = [[NOT_USED] * layout.size for _ in range(layout.size)]
+        for cell, (i, j) in enumerate(layout.coords):
+            if self.p1_cells >> cell & 1:
+                nodes[i][j] = P1_CLAIMED
+            elif self.p2_cells >> cell & 1:
+                nodes[i][j] = P2_CLAIMED
+            else:
+                nodes[i][j] = layout.labels[cell]
+        return nodes
+
+    def get_line_claimers(self) -> List[str]:
+        """ Return the claimer of every ley-line, rows first, then down-left
+        lines, then down-right lines.
+        """
+        claimers = []
+        for line in range(len(self.layout.line_masks)):
+            if self.p1_lines >> line & 1:
+                claimers.append(P1_CLAIMED)
+            elif self.p2_lines >> line & 1:
+                claimers.append(P2_CLAIMED)
+            else:
+                claimers.append(NOT_CLAIMED)
+        return claimers
+
+    @property
+    def row_line_claimers(self) -> List[str]:
+        """ The claimers of the rows, from top to bottom.
+        """
+        return self.get_line_claimers()[:self.layout.size]
+
+    @property
+    def left_line_claimers(self) -> List[str]:
+        """ The claimers of the down-left ley-lines.
+        """
+        size = self.layout.size
+        return self.get_line_claimers()[size:2 * size]
+
+    @property
+    def right_line_claimers(self) -> List[str]:
+        """ The claimers of the down-right ley-lines.
+        """
+        return self.get_line_claimers()[2 * self.layout.size:]
 
     def make_move(self, move: str) -> 'StoneHengeState':
         """
@@ -200,27 +746,164 @@ class StoneHengeState(GameState):
         >>> str(s.make_move('A')) == str(StoneHengeState(False, new_m, ['1', '@', '@'], ['1', '@', '@'], ['@', '@', '@']))
         True
         """
-        # update nodes
-        updated_nodes = copy_nodes(self.nodes)
-        for i in range(len(updated_nodes)):
-            for j in range(len(updated_nodes[i])):
-                if updated_nodes[i][j] == move:
-                    if self.p1_turn:
-                        updated_nodes[i][j] = P1_CLAIMED
-                    else:
-                        updated_nodes[i][j] = P2_CLAIMED
-
-        # update claimed lay lines
-        claimed_row_lines = get_update_lines(
-            self.row_line_claimers, get_row_lines(updated_nodes))
-        claimed_left_lines = get_update_lines(
-            self.left_line_claimers, get_down_left_lines(updated_nodes))
-        claimed_right_lines = get_update_lines(
-            self.right_line_claimers, get_down_right_lines(updated_nodes))
-
-        return StoneHengeState(not self.p1_turn, updated_nodes,
-                               claimed_row_lines,
-                               claimed_left_lines, claimed_right_lines)
+        state = self._copy()
+        state._apply(state.layout.cell_of[move])
+        return state
+
+    def _new_claims(self, cell: int, p1_counts: int, p2_counts: int) -> int:
+        """
+        Return the unclaimed ley-lines through cell that are claimed once the
+        per-line counts are p1_counts and p2_counts, as a bitmask.
+
+        Only the player who took cell can gain a claim from it.
+        """
+        layout = self.layout
+        claimed = self.p1_lines | self.p2_lines
+        new_claims = 0
+        for line in layout.cell_lines[cell]:
+            if claimed >> line & 1:
+                continue
+            shift = COUNT_WIDTH * line
+            if get_claimer(p1_counts >> shift & COUNT_MASK,
+                           p2_counts >> shift & COUNT_MASK,
+                           layout.line_sizes[line]) != NOT_CLAIMED:
+                new_claims |= 1 << line
+        return new_claims
+
+    def _apply(self, cell: int) -> int:
+        """
+        Let the current player take cell, updating this state in place, and
+        return the ley-lines that became claimed, as a bitmask.
+        """
+        layout = self.layout
+        if self.p1_turn:
+            self.p1_cells |= 1 << cell
+            self.p1_counts += layout.count_steps[cell]
+            new_claims = self._new_claims(cell, self.p1_counts,
+                                          self.p2_counts)
+            if new_claims:
+                self.p1_lines |= new_claims
+                self.p1_claims += count_bits(new_claims)
+        else:
+            self.p2_cells |= 1 << cell
+            self.p2_counts += layout.count_steps[cell]
+            new_claims = self._new_claims(cell, self.p1_counts,
+                                          self.p2_counts)
+            if new_claims:
+                self.p2_lines |= new_claims
+                self.p2_claims += count_bits(new_claims)
+        if new_claims:
+            self.winner = get_winner_by_claims(self.p1_claims,
+                                               self.p2_claims,
+                                               len(layout.line_masks))
+        self.hashes = tuple(
+            code ^ key for code, key in
+            zip(self.hashes, layout.move_keys(self.get_current_player_name(),
+                                              cell, new_claims)))
+        self.p1_turn = not self.p1_turn
+        return new_claims
+
+    def push(self, move: str) -> None:
+        """
+        Apply move to this state in place, so that pop() can undo it.
+
+        >>> s = create_start_henge_state(True, 1)
+        >>> s.push('A')
+        >>> s.get_winner(), s.get_possible_moves()
+        ('p1', [])
+        >>> s.pop()
+        >>> s == create_start_henge_state(True, 1)
+        True
+        """
+        cell = self.layout.cell_of[move]
+        new_claims = self._apply(cell)
+        if self._pushed is None:
+            self._pushed = []
+        self._pushed.append(cell)
+        self._pushed.append(new_claims)
+
+    def pop(self) -> None:
+        """
+        Undo the most recent push() that has not been undone yet.
+        """
+        new_claims = self._pushed.pop()
+        cell = self._pushed.pop()
+        step = self.layout.count_steps[cell]
+        self.p1_turn = not self.p1_turn
+        if self.p1_turn:
+            self.p1_cells &= ~(1 << cell)
+            self.p1_counts -= step
+            if new_claims:
+                self.p1_lines &= ~new_claims
+                self.p1_claims -= count_bits(new_claims)
+        else:
+            self.p2_cells &= ~(1 << cell)
+            self.p2_counts -= step
+            if new_claims:
+                self.p2_lines &= ~new_claims
+                self.p2_claims -= count_bits(new_claims)
+        if new_claims:
+            self.winner = get_winner_by_claims(self.p1_claims,
+                                               self.p2_claims,
+                                               len(self.layout.line_masks))
+        self.hashes = tuple(
+            code ^ key for code, key in
+            zip(self.hashes,
+                self.layout.move_keys(self.get_current_player_name(), cell,
+                                      new_claims)))
+
+    def is_over(self) -> bool:
+        """
+        Return whether the game is over at this state, because a player has
+        won or every cell is taken.
+
+        >>> s = create_start_henge_state(True, 1)
+        >>> s.is_over(), s.make_move('A').is_over()
+        (False, True)
+        """
+        return (self.winner is not None or
+                self.p1_cells | self.p2_cells == self.layout.all_cells)
+
+    def __eq__(self, other: Any) -> bool:
+        """
+        Return whether self and other have the same board, claimers and
+        current player.
+
+        >>> s = create_start_henge_state(True, 2)
+        >>> s.make_move('A').make_move('G').make_move('B') == \
+        s.make_move('B').make_move('G').make_move('A')
+        True
+        >>> s == create_start_henge_state(False, 2)
+        False
+        """
+        return (type(self) == type(other) and
+                self.hashes[0] == other.hashes[0] and
+                self._bits() == other._bits())
+
+    def __hash__(self) -> int:
+        """
+        Return a hash of this state, consistent with __eq__.
+        """
+        return self.hashes[0]
+
+    def _bits(self) -> tuple:
+        """
+        Return everything that tells this state apart from other states.
+        """
+        return (self.p1_turn, self.layout.side_length, self.p1_cells,
+                self.p2_cells, self.p1_lines, self.p2_lines)
+
+    def __reduce__(self) -> tuple:
+        """
+        Return how to pickle this state: as its bitboards only, leaving the
+        layout and counts to be rebuilt when it is unpickled.
+
+        >>> import pickle
+        >>> s = create_start_henge_state(True, 2).make_move('A')
+        >>> pickle.loads(pickle.dumps(s)) == s
+        True
+        """
+        return restore_henge_state, self._bits()
 
     def __str__(self) -> str:
         """
@@ -240,59 +923,68 @@ class StoneHengeState(GameState):
                 @   @
         """
         row_lines = get_row_lines(self.nodes)
-
         left_claimers = list(self.left_line_claimers)
         right_claimers = list(self.right_line_claimers)
         row_claimers = list(self.row_line_claimers)
 
+        # Every cell and claimer is printed centred in width characters, and
+        # neighbouring cells of a row start pitch characters apart, so the
+        # cells of the next row sit half a pitch to the side.
+        width = self.layout.label_width
+        pitch = width + 3
+        half = pitch // 2
+        last = len(row_lines) - 1
+
+        def cells(tokens: List[str]) -> str:
+            """ Return tokens printed width wide and pitch apart.
+            """
+            return '   '.join(token.center(width) for token in tokens)
+
+        def row_indent(row: int) -> int:
+            """ Return the column the claimer of row is printed at.
+            """
+            return half if row == last else half * (last - 1 - row)
+
         outputs = []
 
         # first two lines
         first_two_left_claimers, left_claimers = \
             left_claimers[:2], left_claimers[2:]
-        outputs.append('   '.join(first_two_left_claimers))
-        outputs.append('/   /')
+        first_cell = row_indent(0) + pitch
+        outputs.append(indent(cells(first_two_left_claimers),
+                              first_cell + half))
+        outputs.append(indent('/' + ' ' * (pitch - 1) + '/',
+                              first_cell + width))
 
         # body (before central row)
-        for i in range(len(row_lines) - 1):
-            row = row_lines[i]
-            line = row_claimers[i] + ' - ' + ' - '.join(row)
-            ln = len(left_claimers)
-            if ln > 0:
-                line += '   ' + left_claimers.pop(0)
-            outputs.append(line)
-            outputs.append(' '.join(['/ \\'] * len(row)) + ' /')
+        for i in range(last):
+            row = [cell.center(width) for cell in row_lines[i]]
+            line = row_claimers[i].center(width) + ' - ' + ' - '.join(row)
+            if left_claimers:
+                line += '   ' + left_claimers.pop(0).center(width)
+            outputs.append(indent(line, row_indent(i)))
+            if i < last - 1:
+                links = ' '.join(['/' + ' ' * width + '\\'] * len(row))
+                outputs.append(indent(links + ' /',
+                                      row_indent(i) + pitch - 1))
 
         # body (last row)
-        row = row_lines[-1]
-        outputs[-1] = ' '.join(['\\ /'] * len(row)) + ' \\'
+        row = [cell.center(width) for cell in row_lines[-1]]
+        links = (' ' * width).join(['\\ /'] * len(row))
+        outputs.append(indent(links + ' ' * width + '\\',
+                              row_indent(last - 1) + pitch + width))
         last_right_claimer = right_claimers.pop(-1)
-        outputs.append('{} - {}   {}'.format(row_claimers[-1],
-                                             ' - '.join(row),
-                                             last_right_claimer))
+        outputs.append(indent('{} - {}   {}'.format(
+            row_claimers[-1].center(width), ' - '.join(row),
+            last_right_claimer.center(width)), row_indent(last)))
 
         # last two lines
-        outputs.append('   '.join(['\\'] * len(row)))
-        outputs.append('   '.join(right_claimers))
-
-        # add indents
-        dec = True
-        count = 4 + 2 * (len(self.nodes) - 1)
-        for i in range(len(outputs)):
-            if i % 2 == 0 and i != 0 and i != len(outputs) - 1:
-                outputs[i] = indent(outputs[i], count - 4)
-            else:  # link lines
-                outputs[i] = indent(outputs[i], count)
-
-            if count == 4:
-                dec = False
-
-            if dec:
-                count -= 1
-            else:
-                count += 1
+        first_cell = row_indent(last) + pitch
+        outputs.append(indent((' ' * (pitch - 1)).join(['\\'] * len(row)),
+                              first_cell + width))
+        outputs.append(indent(cells(right_claimers), first_cell + half))
 
-        return '\n'.join(outputs)
+        return '\n'.join(line.rstrip() for line in outputs)
 
     def __repr__(self) -> str:
         """
@@ -313,6 +1005,77 @@ class StoneHengeState(GameState):
         return pprint.pformat(self.nodes) + pprint.pformat(self.p1_turn) \
                + pprint.pformat(claimers)
 
+    def state_key(self) -> int:
+        """
+        Return the 64-bit Zobrist hash of this state, for use in caches. It
+        is kept up to date by every move, so this is O(1).
+
+        >>> m = [['x', 'A', 'B'], ['C', 'D', 'E'], ['F', 'G', 'x']]
+        >>> s = StoneHengeState(True, m, ['@', '@', '@'], \
+        ['@', '@', '@'], ['@', '@', '@'])
+        >>> s.state_key() == s.make_move('A').make_move('G').state_key()
+        False
+        >>> s.state_key() == StoneHengeState(True, copy_nodes(m), \
+        ['@', '@', '@'], ['@', '@', '@'], ['@', '@', '@']).state_key()
+        True
+        """
+        return self.hashes[0]
+
+    def canonical_key(self) -> int:
+        """
+        Return the same 64-bit key for this state and every state it can be
+        rotated or reflected into, for use in caches: the smallest of its
+        symmetric Zobrist hashes, which are kept up to date by every move.
+
+        >>> s = create_start_henge_state(True, 1)
+        >>> s.make_move('A').canonical_key() == \
+        s.make_move('C').canonical_key()
+        True
+        >>> s.make_move('A').state_key() == s.make_move('C').state_key()
+        False
+        """
+        return min(self.hashes)
+
+    def canonical_symmetry(self) -> int:
+        """
+        Return the index of a symmetry in layout.symmetries that turns this
+        state into the one whose Zobrist hash is canonical_key().
+        """
+        return self.hashes.index(min(self.hashes))
+
+    def transformed(self, symmetry: int) -> 'StoneHengeState':
+        """
+        Return this state after it is moved by layout.symmetries[symmetry].
+
+        >>> s = create_start_henge_state(True, 2).make_move('A')
+        >>> t = s.transformed(s.canonical_symmetry())
+        >>> t.state_key() == s.canonical_key()
+        True
+        """
+        layout = self.layout
+        return StoneHengeState.from_bits(
+            layout, self.p1_turn,
+            layout.transform(self.p1_cells, symmetry, False),
+            layout.transform(self.p2_cells, symmetry, False),
+            layout.transform(self.p1_lines, symmetry, True),
+            layout.transform(self.p2_lines, symmetry, True))
+
+    def map_move(self, move: str, symmetry: int,
+                 inverse: bool = False) -> str:
+        """
+        Return where move goes when the board is moved by
+        layout.symmetries[symmetry], or where it comes from if inverse.
+
+        >>> s = create_start_henge_state(True, 2)
+        >>> s.map_move(s.map_move('A', 3), 3, True)
+        'A'
+        """
+        layout = self.layout
+        cell_map = layout.symmetries[symmetry][0]
+        if inverse:
+            return layout.labels[cell_map.index(layout.cell_of[move])]
+        return layout.labels[cell_map[layout.cell_of[move]]]
+
     def get_possible_moves(self) -> list:
         """
         Return all possible moves that can be applied to this state.
@@ -323,52 +1086,147 @@ class StoneHengeState(GameState):
         >>> s.get_possible_moves()
         ['A', 'B', 'C', 'D', 'E', 'F', 'G']
         """
-        if self.get_winner():
+        if self.winner:
             return []
 
-        moves = []
-        for row in self.nodes:
-            for cell in row:
-                if cell not in [NOT_USED, P1_CLAIMED, P2_CLAIMED]:
-                    moves.append(cell)
-
-        return moves
+        taken = self.p1_cells | self.p2_cells
+        return [label for cell, label in enumerate(self.layout.labels)
+                if not taken >> cell & 1]
 
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
         player can guarantee from state self.
 
+        The estimate is look_ahead(), remembered for this state and all of
+        its rotations and reflections, and rough_outcome_cost counts what
+        it took.
+
         >>> m = [['x', 'A', 'B'], ['C', 'D', 'E'], ['F', 'G', 'x']]
         >>> s = StoneHengeState(True, m, ['@', '@', '@'], \
         ['@', '@', '@'], ['@', '@', '@'])
         >>> s.rough_outcome()
+        0.0
+        >>> s.make_move('A').make_move('B').rough_outcome()
         1
         """
-        if self.get_winner() == self.get_current_player_name():
-            return 1
-        if self.get_winner() and self.get_winner() \
-                != self.get_current_player_name():
-            return - 1
-
-        for move in self.get_possible_moves():
-            next_state = self.make_move(move)
-            score = next_state.rough_outcome()
-            if score == 1:
-                return -1
-
-        claimers = self.row_line_claimers + \
-                   self.left_line_claimers + self.right_line_claimers
-        counter = {P1_CLAIMED: 0, P2_CLAIMED: 0}
-        for claimer in claimers:
-            if claimer != NOT_CLAIMED:
-                counter[claimer] += 1
-
-        if self.p1_turn:
-            key = P1_CLAIMED
-        key = P2_CLAIMED
+        key = (self.layout.side_length, self.canonical_key())
+        outcome = _ROUGH_OUTCOMES.get(key)
+        if outcome is not None:
+            rough_outcome_cost.memo_hits += 1
+            return outcome
+        outcome = self.look_ahead()
+        rough_outcome_cost.evaluations += 1
+        if len(_ROUGH_OUTCOMES) >= ROUGH_OUTCOME_MEMO_SIZE:
+            _ROUGH_OUTCOMES.clear()
+        _ROUGH_OUTCOMES[key] = outcome
+        return outcome
+
+    def look_ahead(self) -> float:
+        """
+        Return the rough outcome of this state, looking exactly two moves
+        ahead: WIN if the current player can win with their next move, LOSE
+        if the other player can win right after every such move, and
+        otherwise the share of the ley-lines the current player is ahead
+        on, which is strictly between LOSE and WIN.
+
+        Only the cells that win are looked for, without making any state,
+        so this takes at most one pass over the cells for each player plus,
+        for every move, one pass over the cells the other player could win
+        with.
+
+        >>> s = create_start_henge_state(True, 2)
+        >>> s = s.make_move('D').make_move('A').make_move('C')
+        >>> s = s.make_move('E').make_move('G')
+        >>> s.look_ahead()
+        -1
+        """
+        if self.winner is not None:
+            return self.WIN if self.winner == self.get_current_player_name() \
+                else self.LOSE
+        empty = self.layout.all_cells & ~(self.p1_cells | self.p2_cells)
+        if not empty:
+            return self.DRAW
+
+        if self._wins_with(self.p1_turn, empty):
+            return self.WIN
+        # A move only ever takes away the other player's winning moves, so
+        # those they would have if it were their turn now are all there is
+        # to check after each move.
+        threats = self._wins_with(not self.p1_turn, empty, True)
+        if threats:
+            for cell in _cells_of(empty):
+                self.push(self.layout.labels[cell])
+                answered = self._wins_with(self.p1_turn,
+                                           threats & ~(1 << cell))
+                self.pop()
+                if not answered:
+                    break
+            else:
+                return self.LOSE
+        return self._claim_share()
 
-        return max([1, counter[key] / len(claimers) / 2]) * 2 - 1
+    def _wins_with(self, p1: bool, cells: int, every: bool = False) -> int:
+        """
+        Return the cells among cells with which Player 1 if p1, or else
+        Player 2, would win at once if it were their turn, as a bitmask.
+        Unless every, cells are no longer looked at after the first one that
+        wins.
+        """
+        layout = self.layout
+        if p1:
+            mine, theirs = self.p1_claims, self.p2_claims
+            my_counts, their_counts = self.p1_counts, self.p2_counts
+        else:
+            mine, theirs = self.p2_claims, self.p1_claims
+            my_counts, their_counts = self.p2_counts, self.p1_counts
+        half = len(layout.line_masks) / 2
+        # The claims still needed to win; with half of the lines the other
+        # player can only be tied.
+        needed = half - mine
+        if theirs == half or needed > LINES_PER_CELL:
+            return 0
+
+        claimed = self.p1_lines | self.p2_lines
+        wins = 0
+        for cell in _cells_of(cells):
+            rough_outcome_cost.cells_checked += 1
+            gained = 0
+            for line in layout.cell_lines[cell]:
+                if claimed >> line & 1:
+                    continue
+                shift = COUNT_WIDTH * line
+                count = (my_counts >> shift & COUNT_MASK) + 1
+                if count > their_counts >> shift & COUNT_MASK and \
+                        count * 2 >= layout.line_sizes[line]:
+                    gained += 1
+            if gained >= needed:
+                wins |= 1 << cell
+                if not every:
+                    break
+        return wins
+
+    def _claim_share(self) -> float:
+        """
+        Return the claimed ley-lines of the current player less those of the
+        other player, plus half of the unclaimed lines on which the current
+        player has more cells less half of those on which they have fewer,
+        as a share of all the lines.
+        """
+        layout = self.layout
+        claimed = self.p1_lines | self.p2_lines
+        leads = 0
+        for line in range(len(layout.line_masks)):
+            if claimed >> line & 1:
+                continue
+            shift = COUNT_WIDTH * line
+            p1_count = self.p1_counts >> shift & COUNT_MASK
+            p2_count = self.p2_counts >> shift & COUNT_MASK
+            if p1_count != p2_count:
+                leads += 1 if p1_count > p2_count else -1
+        share = (self.p1_claims - self.p2_claims + leads / 2) \
+            / len(layout.line_masks)
+        return share if self.p1_turn else 0.0 - share
 
     def get_winner(self):
         """ Check and return the name of the player who had won
@@ -379,25 +1237,69 @@ class StoneHengeState(GameState):
         >>> s.get_winner()
         'p1'
         """
-        claimers = self.row_line_claimers + \
-                   self.left_line_claimers + self.right_line_claimers
-        counter = {P1_CLAIMED: 0, P2_CLAIMED: 0}
-        for claimer in claimers:
-            if claimer != NOT_CLAIMED:
-                counter[claimer] += 1
-
-        # tie
-        if counter[P1_CLAIMED] == counter[P2_CLAIMED] \
-                and counter[P1_CLAIMED] == len(claimers) / 2:
-            return None
-        # p1 win
-        elif counter[P1_CLAIMED] >= len(claimers) / 2:
-            return 'p1'
-        # p2 win
-        elif counter[P2_CLAIMED] >= len(claimers) / 2:
-            return 'p2'
-        # game is not over
-        return None
+        return self.winner
+
+
+class StonehengeGame(Game):
+    """ A game of Stonehenge
+
+    === Attributes ===
+    current_state - the state the game is at
+    """
+    current_state: StoneHengeState
+
+    def __init__(self, p1_starts: bool,
+                 side_length: Optional[int] = None) -> None:
+        """ Initialize a game on a board with side_length, asking for the
+        side length if it is None, using p1_starts to find who the first
+        player is.
+
+        >>> game = StonehengeGame(True, 2)
+        >>> game.current_state.get_possible_moves()
+        ['A', 'B', 'C', 'D', 'E', 'F', 'G']
+        """
+        if side_length is None:
+            side_length = int(input("Enter the side length of the board: "))
+        self.current_state = create_start_henge_state(p1_starts, side_length)
+
+    def get_instructions(self) -> str:
+        """ Return the instructions for this Game.
+        """
+        return ("Players take turns claiming cells of a hexagonal board. "
+                "Whoever first takes at least half of the cells of a "
+                "ley-line (a row or a diagonal) claims it, and whoever first "
+                "claims at least half of the ley-lines wins.")
+
+    def is_over(self, state: StoneHengeState) -> bool:
+        """ Return whether or not this game is over at state, which the
+        state keeps track of as it is played.
+
+        >>> game = StonehengeGame(True, 1)
+        >>> game.is_over(game.current_state.make_move('A'))
+        True
+        """
+        return state.is_over()
+
+    def is_winner(self, player: str) -> bool:
+        """ Return whether player has won the game.
+
+        Precondition: player is 'p1' or 'p2'.
+
+        >>> game = StonehengeGame(False, 1)
+        >>> game.current_state = game.current_state.make_move('B')
+        >>> game.is_winner('p2'), game.is_winner('p1')
+        (True, False)
+        """
+        return self.current_state.get_winner() == player
+
+    def str_to_move(self, move_string: str) -> str:
+        """ Return the move that move_string represents. If it is not a move,
+        return an invalid move.
+
+        >>> StonehengeGame(True, 1).str_to_move(' b ')
+        'B'
+        """
+        return move_string.strip().upper()
 
 
 if __name__ == "__main__":
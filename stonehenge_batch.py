@@ -0,0 +1,144 @@
+"""
+Evaluate many Stonehenge positions of one board at once with NumPy.
+
+A batch of N positions is an N x cells int8 array with 0 for an empty cell,
+1 for a cell taken by Player 1 and 2 for one taken by Player 2, in the cell
+order of the board's HengeLayout. Because a ley-line stays with whoever
+claimed it first, the board alone does not always tell who claimed a line;
+a batch can also carry an N x ley-lines int8 array of the claimers so far,
+coded the same way, which encode() builds from StoneHengeStates. Lines
+claimed there keep their claimer and the rest are claimed by their counts,
+just as StoneHengeState does after every move, so the results are the same
+as those of the states.
+
+NumPy is optional: this module can be imported without it, but
+BatchEvaluator raises ImportError when it is used.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from stonehenge import HengeLayout, StoneHengeState, get_layout
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EMPTY = 0
+P1 = 1
+P2 = 2
+
+
+def _unpack(values: List[int], count: int) -> 'np.ndarray':
+    """
+    Return a row of count 0s and 1s for each bitmask of values, lowest bit
+    first.
+    """
+    size = (count + 7) // 8
+    packed = np.frombuffer(b''.join(value.to_bytes(size, 'little')
+                                    for value in values), dtype=np.uint8)
+    return np.unpackbits(packed.reshape(len(values), size), axis=1,
+                         count=count, bitorder='little')
+
+
+class BatchEvaluator:
+    """
+    Computes the ley-line counts, claimers, winner and legal moves of every
+    position of a batch on one board.
+
+    layout - the board the positions are on
+    incidence - the cells x ley-lines 0/1 matrix of which cell is on which
+                ley-line
+    line_sizes - the number of cells on each ley-line
+    """
+    layout: HengeLayout
+    incidence: 'np.ndarray'
+    line_sizes: 'np.ndarray'
+
+    def __init__(self, side_length: int) -> None:
+        """
+        Initialize an evaluator of positions on the board with side_length.
+        """
+        if np is None:
+            raise ImportError("BatchEvaluator needs NumPy; install numpy to "
+                              "evaluate positions in batches.")
+        self.layout = get_layout(side_length)
+        cell_count = len(self.layout.labels)
+        self.incidence = _unpack(self.layout.line_masks,
+                                 cell_count).T.astype(np.int16)
+        self.line_sizes = np.array(self.layout.line_sizes, dtype=np.int16)
+
+    def encode(self, states: List[StoneHengeState]) -> Tuple['np.ndarray',
+                                                             'np.ndarray']:
+        """
+        Return the cells and the ley-line claimers of states, which are on
+        this evaluator's board, as a batch.
+        """
+        cell_count = len(self.layout.labels)
+        line_count = len(self.layout.line_masks)
+        cells = _unpack([state.p1_cells for state in states], cell_count) \
+            + P2 * _unpack([state.p2_cells for state in states], cell_count)
+        lines = _unpack([state.p1_lines for state in states], line_count) \
+            + P2 * _unpack([state.p2_lines for state in states], line_count)
+        return cells.astype(np.int8), lines.astype(np.int8)
+
+    def evaluate(self, cells: 'np.ndarray',
+                 lines: Optional['np.ndarray'] = None) -> Dict[str,
+                                                               'np.ndarray']:
+        """
+        Return, for the positions of the batch cells with the ley-lines
+        already claimed in lines (or none if it is None):
+
+            p1_counts, p2_counts - N x ley-lines, the cells of each player on
+                                   each ley-line
+            claimers - N x ley-lines, P1, P2 or EMPTY for each ley-line
+            p1_claims, p2_claims - N, the ley-lines each player claimed
+            winners - N, P1 or P2 for a player who won, or EMPTY
+            legal - N x cells, whether taking each cell is a possible move
+        """
+        p1_counts = (cells == P1).astype(np.int16) @ self.incidence
+        p2_counts = (cells == P2).astype(np.int16) @ self.incidence
+
+        # get_claimer, for every line of every position at once
+        sizes = self.line_sizes
+        claimers = np.where((p1_counts > p2_counts) &
+                            (2 * p1_counts >= sizes), P1,
+                            np.where((p2_counts > p1_counts) &
+                                     (2 * p2_counts >= sizes), P2, EMPTY))
+        if lines is not None:
+            claimers = np.where(lines != EMPTY, lines, claimers)
+        claimers = claimers.astype(np.int8)
+
+        # get_winner_by_claims, for every position at once
+        p1_claims = (claimers == P1).sum(axis=1)
+        p2_claims = (claimers == P2).sum(axis=1)
+        half = claimers.shape[1] / 2
+        tie = (p1_claims == half) & (p2_claims == half)
+        winners = np.where(tie, EMPTY,
+                           np.where(p1_claims >= half, P1,
+                                    np.where(p2_claims >= half, P2,
+                                             EMPTY))).astype(np.int8)
+
+        legal = (cells == EMPTY) & (winners == EMPTY)[:, np.newaxis]
+        return {'p1_counts': p1_counts, 'p2_counts': p2_counts,
+                'claimers': claimers, 'p1_claims': p1_claims,
+                'p2_claims': p2_claims, 'winners': winners, 'legal': legal}
+
+
+_EVALUATORS = {}
+
+
+def get_batch_evaluator(side_length: int) -> BatchEvaluator:
+    """
+    Return the evaluator of the board with side_length, building it only
+    the first time it is asked for.
+    """
+    if side_length not in _EVALUATORS:
+        _EVALUATORS[side_length] = BatchEvaluator(side_length)
+    return _EVALUATORS[side_length]
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
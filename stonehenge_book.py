@@ -0,0 +1,285 @@
+"""
+An opening book for Stonehenge.
+
+The book is built offline by solving every position reachable in at most a
+given number of moves from the start of a board with a side length up to
+EXACT_SIDE_LENGTH, and stores the best move of each as a fixed-width record:
+
+    canonical key (8 bytes) | side length (1 byte) | cell (1 byte) |
+    score (1 byte)
+
+Positions that are rotations or reflections of each other share one record,
+whose cell is given for the position with the canonical key and is mapped
+back to the orientation of the position being looked up. Records are sorted
+by canonical key, so a book that is memory-mapped at load time can be
+searched with a binary search without reading it into memory.
+
+Larger boards are left out: alpha-beta cannot solve their openings in a
+reasonable time, and a move that is only a guess is no better than the one
+the player's own strategy would find.
+
+A book is written to a temporary file that then replaces the old one, so
+players that have the old book mapped keep reading it until get_book sees
+that the file has changed and opens the new one.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from game_state import GameState
+from stonehenge import StoneHengeState, StonehengeGame, \
+    create_start_henge_state
+from strategy import alphabeta_scores, recursive_minimax_alphabeta
+from transposition import TranspositionTable
+
+BOOK_PATH = os.path.join(tempfile.gettempdir(), 'stonehenge_book.bin')
+EXACT_SIDE_LENGTH = 3
+SIDE_LENGTHS = range(1, EXACT_SIDE_LENGTH + 1)
+DEFAULT_DEPTH = 2
+
+_MAGIC = b'HENGEBK4'
+_HEADER = struct.Struct('<8sQ')
+_RECORD = struct.Struct('<QBBb')
+
+
+def _game_at(state: StoneHengeState) -> StonehengeGame:
+    """
+    Return a StonehengeGame at state.
+    """
+    game = StonehengeGame(state.p1_turn, state.layout.side_length)
+    game.current_state = state
+    return game
+
+
+def opening_positions(side_length: int,
+                      depth: int) -> Dict[int, StoneHengeState]:
+    """
+    Return every unfinished position reachable in at most depth moves from
+    the start of a board with side_length, with either player moving first,
+    keyed on their canonical_key(). Only one of the positions that are
+    symmetric to each other is kept.
+
+    >>> len(opening_positions(1, 0))
+    2
+    >>> len(opening_positions(2, 1))
+    6
+    """
+    frontier = [create_start_henge_state(True, side_length),
+                create_start_henge_state(False, side_length)]
+    positions = {}
+    for _ in range(depth + 1):
+        next_frontier = []
+        for state in frontier:
+            key = state.canonical_key()
+            if key in positions or state.is_over():
+                continue
+            positions[key] = state
+            next_frontier.extend(state.make_move(move)
+                                 for move in state.get_possible_moves())
+        frontier = next_frontier
+    return positions
+
+
+def solve_position(state: StoneHengeState,
+                   table: TranspositionTable) -> Tuple[str, int]:
+    """
+    Return the best move at state and its score for the current player,
+    using table to remember solved positions between calls.
+    """
+    game = _game_at(state)
+    game.transposition_table = table
+    move = recursive_minimax_alphabeta(game)
+    score = alphabeta_scores(game, state.make_move(move),
+                             state.get_current_player_name(), GameState.LOSE,
+                             GameState.WIN, table)
+    return move, score
+
+
+def build_book(path: str = BOOK_PATH, side_lengths: Any = SIDE_LENGTHS,
+               depth: int = DEFAULT_DEPTH) -> int:
+    """
+    Solve every position up to depth moves into a game on boards with
+    side_lengths, write them to a book at path and return how many there are.
+
+    The book is written next to path and then moved over it, so a book
+    already at path is never truncated under a player that has it mapped.
+
+    Raise ValueError if a side length is larger than EXACT_SIDE_LENGTH.
+    """
+    side_lengths = list(side_lengths)
+    too_large = [side_length for side_length in side_lengths
+                 if side_length > EXACT_SIDE_LENGTH]
+    if too_large:
+        raise ValueError("Boards with a side length above {} cannot be "
+                         "solved, but {} were asked for."
+                         .format(EXACT_SIDE_LENGTH, too_large))
+    records = []
+    for side_length in side_lengths:
+        table = TranspositionTable()
+        for key, state in opening_positions(side_length, depth).items():
+            move, score = solve_position(state, table)
+            move = state.map_move(move, state.canonical_symmetry())
+            records.append((key, side_length, state.layout.cell_of[move],
+                            score))
+    records.sort()
+
+    handle, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=os.path.basename(path) + '.')
+    try:
+        with os.fdopen(handle, 'wb') as book_file:
+            book_file.write(_HEADER.pack(_MAGIC, len(records)))
+            for record in records:
+                book_file.write(_RECORD.pack(*record))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return len(records)
+
+
+class OpeningBook:
+    """
+    A book of Stonehenge positions and their best moves, memory-mapped from
+    a file.
+
+    path - the file the book is read from
+    size - the number of positions in the book
+    """
+    path: str
+    size: int
+
+    def __init__(self, path: str = BOOK_PATH) -> None:
+        """
+        Open the book at path, which is empty if there is no valid book
+        there.
+        """
+        self.path = path
+        self.size = 0
+        self._data = None
+        if not os.path.exists(path) or \
+                os.path.getsize(path) < _HEADER.size:
+            return
+        with open(path, 'rb') as book_file:
+            data = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, size = _HEADER.unpack_from(data)
+        if magic != _MAGIC or \
+                len(data) < _HEADER.size + size * _RECORD.size:
+            data.close()
+            return
+        self._data = data
+        self.size = size
+
+    def _record(self, index: int) -> tuple:
+        """
+        Return the record at index.
+        """
+        return _RECORD.unpack_from(self._data,
+                                   _HEADER.size + index * _RECORD.size)
+
+    def lookup(self, state: StoneHengeState) -> Optional[Tuple[str, int]]:
+        """
+        Return the best move at state and its score, or None if state is not
+        in the book.
+        """
+        key = state.canonical_key()
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        side_length = state.layout.side_length
+        while low < self.size:
+            record_key, record_side, cell, score = self._record(low)
+            if record_key != key:
+                return None
+            if record_side == side_length:
+                move = state.map_move(state.layout.labels[cell],
+                                      state.canonical_symmetry(), True)
+                return move, score
+            low += 1
+        return None
+
+    def close(self) -> None:
+        """
+        Release the memory map of this book.
+        """
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+            self.size = 0
+
+
+_BOOKS = {}
+
+
+def _file_version(path: str) -> Optional[tuple]:
+    """
+    Return what identifies the file at path as it is now, or None if there
+    is no file there.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def get_book(path: str = BOOK_PATH) -> OpeningBook:
+    """
+    Return the book at path, opening it again whenever the file there has
+    been built, rebuilt or removed since it was last opened.
+    """
+    version = _file_version(path)
+    if path in _BOOKS:
+        opened, book = _BOOKS[path]
+        if opened == version:
+            return book
+        book.close()
+    book = OpeningBook(path)
+    _BOOKS[path] = (version, book)
+    return book
+
+
+def book_strategy(fallback: Callable[[Any], Any],
+                  path: str = BOOK_PATH) -> Callable[[Any], Any]:
+    """
+    Return a strategy that plays the move in the book at path when the
+    current state is in it, and asks the strategy fallback otherwise.
+    """
+    def strategy(game: Any) -> Any:
+        """
+        Return the book move for game, or the move fallback picks.
+        """
+        state = game.current_state
+        if isinstance(state, StoneHengeState):
+            found = get_book(path).lookup(state)
+            if found is not None:
+                return found[0]
+        return fallback(game)
+
+    strategy.__name__ = 'book_strategy({})'.format(fallback.__name__)
+    return strategy
+
+
+def main(arguments: List[str]) -> None:
+    """
+    Build the book from the command line: an optional depth followed by
+    optional side lengths.
+    """
+    depth = int(arguments[0]) if arguments else DEFAULT_DEPTH
+    side_lengths = [int(argument) for argument in arguments[1:]] or \
+        SIDE_LENGTHS
+    count = build_book(BOOK_PATH, side_lengths, depth)
+    print("Wrote {} positions to {}.".format(count, BOOK_PATH))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -740,5 +740,152 @@ class StonehengeUnitTests(unittest.TestCase):
                           "player can immediately win but {} was returned " +
                           "instead.").format(ro))
 
+    @patch('builtins.input', side_effect = ['2'])
+    def test_stonehenge_states_as_dict_keys(self, input):
+        """
+        Test to make sure equal states reached through different move orders
+        hash the same, so they can be used directly as dictionary keys.
+        """
+        game = StonehengeGame(True)
+        initial_state = game.current_state
+
+        state_1 = initial_state.make_move(game.str_to_move("A"))
+        state_1 = state_1.make_move(game.str_to_move("G"))
+        state_1 = state_1.make_move(game.str_to_move("B"))
+
+        state_2 = initial_state.make_move(game.str_to_move("B"))
+        state_2 = state_2.make_move(game.str_to_move("G"))
+        state_2 = state_2.make_move(game.str_to_move("A"))
+
+        seen = {state_1: 'AGB'}
+        self.assertEqual(state_1, state_2,
+                         "2 states with the same board, claimers and " +
+                         "current player should be equal.")
+        self.assertEqual(seen.get(state_2), 'AGB',
+                         "2 equal states should find the same dictionary " +
+                         "entry.")
+        self.assertNotEqual(state_1, initial_state)
+
+    @patch('builtins.input', side_effect = ['3'])
+    def test_stonehenge_push_pop(self, input):
+        """
+        Test to make sure push() gives the same states as make_move() and
+        pop() undoes each push() exactly.
+        """
+        game = StonehengeGame(True)
+        state = game.current_state.make_move(game.str_to_move("A"))
+        in_place = game.current_state.make_move(game.str_to_move("A"))
+        states = []
+
+        for move in ['K', 'B', 'L', 'C', 'F', 'E', 'G', 'D']:
+            states.append(state)
+            state = state.make_move(game.str_to_move(move))
+            in_place.push(game.str_to_move(move))
+            self.assertEqual(in_place, state)
+            self.assertEqual(str(in_place), str(state))
+
+        while states:
+            in_place.pop()
+            expected = states.pop()
+            self.assertEqual(in_place, expected)
+            self.assertEqual(in_place.get_possible_moves(),
+                             expected.get_possible_moves())
+
+    @patch('builtins.input', side_effect = ['2'])
+    def test_stonehenge_canonical_key(self, input):
+        """
+        Test to make sure states that are rotations or reflections of each
+        other share a canonical key, and that other states do not.
+        """
+        game = StonehengeGame(True)
+        state = game.current_state
+
+        def play(moves):
+            result = state
+            for move in moves:
+                result = result.make_move(game.str_to_move(move))
+            return result
+
+        corners = [play([move]).canonical_key() for move in
+                   ['A', 'B', 'C', 'E', 'F', 'G']]
+        self.assertEqual(len(set(corners)), 1)
+        self.assertNotEqual(play(['A']).state_key(), play(['G']).state_key())
+        self.assertNotEqual(play(['A']).canonical_key(),
+                            play(['D']).canonical_key())
+        self.assertEqual(play(['A', 'D']).canonical_key(),
+                         play(['G', 'D']).canonical_key())
+        self.assertNotEqual(play(['A', 'B']).canonical_key(),
+                            play(['A', 'G']).canonical_key())
+
+    @patch('builtins.input', side_effect=AssertionError)
+    def test_stonehenge_side_length_given(self, input):
+        """
+        Test that a game given its side length does not ask for one, and
+        that games started on the same board do not share their states.
+        """
+        first = StonehengeGame(True, 3)
+        second = StonehengeGame(True, 3)
+        first.current_state.push('A')
+        self.assertIn('A', second.current_state.get_possible_moves())
+        self.assertEqual(StonehengeGame(True, 3).current_state,
+                         second.current_state)
+        self.assertFalse(first.is_winner('p1') or first.is_winner('p2'))
+        self.assertEqual(first.str_to_move(' l\n'), 'L')
+
+    @patch('builtins.input', side_effect=AssertionError)
+    def test_stonehenge_large_board(self, input):
+        """
+        Test that boards with more than 26 cells label their cells AA, AB,
+        ... and can be played to the end by those labels.
+        """
+        game = StonehengeGame(True, 8)
+        state = game.current_state
+        moves = state.get_possible_moves()
+        self.assertEqual(len(moves), 52)
+        self.assertEqual(moves[25:28], ['Z', 'AA', 'AB'])
+        self.assertEqual(moves[-1], 'AZ')
+        self.assertIn(' AZ', str(state))
+
+        state = state.make_move(game.str_to_move('aa'))
+        self.assertNotIn('AA', state.get_possible_moves())
+        self.assertNotIn('AA', str(state))
+        while not game.is_over(state):
+            state = state.make_move(state.get_possible_moves()[-1])
+        game.current_state = state
+        self.assertTrue(game.is_winner('p1') or game.is_winner('p2') or
+                        state.get_possible_moves() == [])
+
+    @patch('builtins.input', side_effect=AssertionError)
+    def test_stonehenge_rough_outcome_bounded(self, input):
+        """
+        Test that rough_outcome() stays strictly between -1 and 1 when
+        neither player can win within two moves, is remembered for the
+        reflections of a state, and only looks two moves ahead on a large
+        board.
+        """
+        from stonehenge import ROUGH_OUTCOME_MEMO_SIZE, _ROUGH_OUTCOMES, \
+            clear_rough_outcomes, rough_outcome_cost
+        state = StonehengeGame(True, 2).current_state.make_move('A')
+        reflected = StonehengeGame(True, 2).current_state.make_move('G')
+        # other tests may have remembered these states already
+        clear_rough_outcomes()
+        self.assertTrue(-1 < state.rough_outcome() < 1)
+        self.assertEqual(reflected.rough_outcome(), state.rough_outcome())
+        self.assertEqual(rough_outcome_cost.evaluations, 1)
+        self.assertEqual(rough_outcome_cost.memo_hits, 2)
+
+        state = StonehengeGame(False, 12).current_state
+        for move in state.get_possible_moves()[::2]:
+            state = state.make_move(move)
+            if state.is_over():
+                break
+        rough_outcome_cost.reset()
+        state.look_ahead()
+        cells = len(state.get_possible_moves())
+        self.assertLessEqual(rough_outcome_cost.cells_checked,
+                             2 * cells + cells * cells)
+        self.assertLessEqual(len(_ROUGH_OUTCOMES), ROUGH_OUTCOME_MEMO_SIZE)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -5,9 +5,12 @@ NOTE: Make sure this file adheres to python-ta.
 Adjust the type annotations as needed, and implement both a recursive
 and an iterative version of minimax.
 """
-from typing import Any, Dict, List
+import time
+from functools import wraps
+from typing import Any, Callable, Optional
 from game import Game
 from game_state import GameState
+from transposition import TranspositionTable
 
 # TODO: Adjust the type annotation as needed.
 
@@ -20,6 +23,248 @@ def interactive_strategy(game: Any) -> Any:
     return game.str_to_move(move)
 
 
+def get_score(game: 'Game', state: 'GameState', player: str) -> int:
+    """ Get score of the state
+    """
+    current_state = game.current_state
+    game.current_state = state
+    won = game.is_winner(player)
+    game.current_state = current_state
+    if won:
+        return GameState.WIN
+    return GameState.LOSE
+
+
+DEFAULT_MOVE_TIME = 1.0
+
+
+class SearchStats:
+    """ Counters describing one search made by a minimax strategy.
+
+        nodes - the number of game states visited by the search
+        depth - the deepest search that finished, for searches limited by
+                depth
+
+        The rest are only counted for a game with a search_callback, see
+        instrumented():
+
+        expanded - the number of states whose moves were listed
+        leaves - the number of states scored without searching below them,
+                 i.e. finished games and states at a depth limit
+        cache_hits - the number of states found in the transposition table
+        max_depth - the most moves below the current state that were made
+        children - the number of states made by make_move or push
+        make_move_time - the seconds spent in make_move and push
+        is_over_time - the seconds spent in game.is_over
+        score_time - the seconds spent in get_score
+        elapsed - the seconds the whole move took
+    """
+    nodes: int
+    depth: int
+    expanded: int
+    leaves: int
+    cache_hits: int
+    max_depth: int
+    children: int
+    make_move_time: float
+    is_over_time: float
+    score_time: float
+    elapsed: float
+
+    def __init__(self) -> None:
+        """ Initialize all counters to zero.
+
+        >>> SearchStats().nodes
+        0
+        """
+        self.nodes = 0
+        self.depth = 0
+        self.expanded = 0
+        self.leaves = 0
+        self.cache_hits = 0
+        self.max_depth = 0
+        self.children = 0
+        self.make_move_time = 0.0
+        self.is_over_time = 0.0
+        self.score_time = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def branching_factor(self) -> float:
+        """ The mean number of children made per state whose moves were
+            listed.
+
+        >>> stats = SearchStats()
+        >>> stats.expanded, stats.children = 4, 10
+        >>> stats.branching_factor
+        2.5
+        """
+        if self.expanded == 0:
+            return 0.0
+        return self.children / self.expanded
+
+
+class _ProbedState:
+    """ A game state that forwards everything to state, counting and timing
+        the moves made on it in stats.
+
+        Children made with make_move are probed as well, one move deeper.
+    """
+    def __init__(self, state: 'GameState', stats: SearchStats,
+                 depth: int) -> None:
+        """ Initialize a probe of state, depth moves below the current state.
+        """
+        self._state = state
+        self._stats = stats
+        self._depth = depth
+
+    def __getattr__(self, name: str) -> Any:
+        """ Return the attribute name of the probed state.
+        """
+        return getattr(self._state, name)
+
+    def __str__(self) -> str:
+        """ Return the string of the probed state.
+        """
+        return str(self._state)
+
+    def _count_child(self, start: float, depth: int) -> None:
+        """ Count a child made depth moves deep since start.
+        """
+        stats = self._stats
+        stats.make_move_time += time.perf_counter() - start
+        stats.children += 1
+        stats.max_depth = max(stats.max_depth, depth)
+
+    def get_possible_moves(self) -> list:
+        """ Return the moves of the probed state.
+        """
+        self._stats.expanded += 1
+        return self._state.get_possible_moves()
+
+    def make_move(self, move: Any) -> '_ProbedState':
+        """ Return a probe of the state move leads to.
+        """
+        start = time.perf_counter()
+        child = self._state.make_move(move)
+        self._count_child(start, self._depth + 1)
+        return _ProbedState(child, self._stats, self._depth + 1)
+
+    def push(self, move: Any) -> None:
+        """ Make move on the probed state in place.
+        """
+        start = time.perf_counter()
+        self._state.push(move)
+        self._depth += 1
+        self._count_child(start, self._depth)
+
+    def pop(self) -> None:
+        """ Undo the last move pushed on the probed state.
+        """
+        self._state.pop()
+        self._depth -= 1
+
+    def rough_outcome(self) -> float:
+        """ Return the rough outcome of the probed state, a leaf of the
+            search.
+        """
+        self._stats.leaves += 1
+        return self._state.rough_outcome()
+
+
+def _unprobed(value: Any) -> Any:
+    """ Return the state probed by value, or value if it is not a probe.
+    """
+    if isinstance(value, _ProbedState):
+        return value._state
+    return value
+
+
+class _ProbedGame:
+    """ A game that forwards everything to game, counting and timing the
+        calls a search makes to it in stats.
+
+        Its current_state is probed, and states set on it are unwrapped, so
+        game itself only ever sees real states.
+    """
+    def __init__(self, game: 'Game', stats: SearchStats) -> None:
+        """ Initialize a probe of game.
+        """
+        object.__setattr__(self, '_game', game)
+        object.__setattr__(self, '_stats', stats)
+
+    def __getattr__(self, name: str) -> Any:
+        """ Return the attribute name of the probed game.
+        """
+        return getattr(self._game, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """ Set the attribute name of the probed game.
+        """
+        setattr(self._game, name, _unprobed(value))
+
+    @property
+    def current_state(self) -> _ProbedState:
+        """ A probe of the current state of the probed game.
+        """
+        return _ProbedState(self._game.current_state, self._stats, 0)
+
+    def is_over(self, state: Any) -> bool:
+        """ Return whether the game is over at state.
+        """
+        start = time.perf_counter()
+        over = self._game.is_over(_unprobed(state))
+        self._stats.is_over_time += time.perf_counter() - start
+        if over:
+            self._stats.leaves += 1
+        return over
+
+    def is_winner(self, player: str) -> bool:
+        """ Return whether player has won, which is what get_score asks.
+        """
+        start = time.perf_counter()
+        won = self._game.is_winner(player)
+        self._stats.score_time += time.perf_counter() - start
+        return won
+
+
+def instrumented(strategy: Callable[..., Any]) -> Callable[..., Any]:
+    """ Return strategy, made to deliver a SearchStats with all its counters
+        to game.search_callback after every move on a game that has one.
+
+        Games without a search_callback are passed straight to strategy, so
+        the search itself is not slowed down at all.
+    """
+    @wraps(strategy)
+    def probed_strategy(game: Any, *args: Any, **kwargs: Any) -> Any:
+        """ Return the move strategy picks for game.
+        """
+        callback = getattr(game, 'search_callback', None)
+        if callback is None:
+            return strategy(game, *args, **kwargs)
+
+        stats = SearchStats()
+        table = getattr(game, 'transposition_table', None)
+        hits = table.hits if table is not None else 0
+        # left as None by strategies that do not search
+        game.search_stats = None
+        start = time.perf_counter()
+        move = strategy(_ProbedGame(game, stats), *args, **kwargs)
+        stats.elapsed = time.perf_counter() - start
+
+        table = getattr(game, 'transposition_table', table)
+        if table is not None:
+            stats.cache_hits = table.hits - hits
+        searched = getattr(game, 'search_stats', None)
+        if searched is not None:
+            stats.nodes, stats.depth = searched.nodes, searched.depth
+        game.search_stats = stats
+        callback(stats)
+        return move
+    return probed_strategy
+
+
+@instrumented
 def rough_outcome_strategy(game: Any) -> Any:
     """
     Return a move for game by picking a move which results in a state with
@@ -59,40 +304,178 @@ def rough_outcome_strategy(game: Any) -> Any:
     return best_move
 
 
-def get_score(game: 'Game', state: 'GameState', player: str) -> int:
-    """ Get score of the state
+class SearchTimeout(Exception):
+    """ Raised when a search runs out of its budget.
     """
-    game.current_state = state
-    if game.is_winner(player):
-        return GameState.WIN
-    return GameState.LOSE
+    pass
+
+
+class SearchBudget:
+    """ The time and number of states a search may spend on one move.
+
+        deadline - the time.monotonic() value by which the search must end,
+                   or None for no time limit
+        max_nodes - the number of states the search may visit, or None for
+                    no limit
+        cutoff - whether the search has stopped at its depth limit at least
+                 once, meaning that a deeper search may find something new
+    """
+    deadline: Optional[float]
+    max_nodes: Optional[int]
+    cutoff: bool
 
+    def __init__(self, time_limit: Optional[float] = None,
+                 max_nodes: Optional[int] = None) -> None:
+        """ Initialize a budget of time_limit seconds from now and max_nodes
+            states.
 
-def recursive_minimax_scores(game: 'Game', state: 'GameState',
-                             player: str) -> Any:
+        >>> SearchBudget(max_nodes=10).deadline is None
+        True
+        """
+        self.deadline = None
+        if time_limit is not None:
+            self.deadline = time.monotonic() + time_limit
+        self.max_nodes = max_nodes
+        self.cutoff = False
+
+    def spend(self, stats: SearchStats) -> None:
+        """ Count one more visited state in stats, raising SearchTimeout if
+            that is more than this budget allows.
+
+        >>> budget, stats = SearchBudget(max_nodes=1), SearchStats()
+        >>> budget.spend(stats)
+        >>> budget.spend(stats)
+        Traceback (most recent call last):
+        ...
+        strategy.SearchTimeout
+        """
+        if self.max_nodes is not None and stats.nodes >= self.max_nodes:
+            raise SearchTimeout
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise SearchTimeout
+        stats.nodes += 1
+
+
+def get_transposition_table(game: 'Game') -> TranspositionTable:
+    """ Return the transposition table kept on game, creating one if needed.
+
+        The table lives on the game so that solved positions are reused across
+        consecutive moves of the same game.
+    """
+    table = getattr(game, 'transposition_table', None)
+    if table is None:
+        table = TranspositionTable()
+        game.transposition_table = table
+    return table
+
+
+def _start_search(game: 'Game') -> SearchStats:
+    """ Attach a fresh SearchStats to game so it can be read after the move.
+    """
+    stats = SearchStats()
+    game.search_stats = stats
+    return stats
+
+
+def _is_exact(score: int, alpha: int, beta: int) -> bool:
+    """ Return whether score, returned from the window [alpha, beta], is the
+        exact minimax value rather than a bound on it.
+
+        Scores are only ever LOSE or WIN, so a bound that reaches either end
+        of that range is exact.
+
+    >>> _is_exact(GameState.WIN, GameState.LOSE, GameState.WIN)
+    True
+    >>> _is_exact(GameState.DRAW, GameState.DRAW, GameState.WIN)
+    False
+    """
+    return ((score > alpha or score <= GameState.LOSE) and
+            (score < beta or score >= GameState.WIN))
+
+
+def distinct_moves(state: 'GameState', keep_last: bool = False) -> list:
+    """ Return the moves of state, leaving out all but the first (or the last,
+        if keep_last) of the moves whose resulting states are symmetric to
+        each other, since they have the same score.
+    """
+    moves = state.get_possible_moves()
+    if keep_last:
+        moves.reverse()
+    # the states made here to compare are not part of any search
+    state = _unprobed(state)
+    seen = set()
+    distinct = []
+    for move in moves:
+        key = state.make_move(move).canonical_key()
+        if key not in seen:
+            seen.add(key)
+            distinct.append(move)
+    if keep_last:
+        distinct.reverse()
+    return distinct
+
+
+def recursive_minimax_scores(game: 'Game', state: 'GameState', player: str,
+                             table: Optional[TranspositionTable] = None,
+                             stats: Optional[SearchStats] = None,
+                             budget: Optional[SearchBudget] = None) -> Any:
     """ Find a move that produces a 'highest guaranteed score' at each step
         for the current player.
+
+        If table is given, solved positions are looked up in and stored to it.
+        If stats is given, every visited state is counted in it, and if
+        budget is given as well, every visited state is spent from it, which
+        raises SearchTimeout once it runs out, leaving state with any moves
+        pushed on it.
     """
+    if budget is not None:
+        budget.spend(stats)
+    elif stats is not None:
+        stats.nodes += 1
+    if table is not None:
+        key = (state.canonical_key(), player)
+        score = table.get(key)
+        if score is not None:
+            return score
+
     # base case
     if game.is_over(state):
-        return get_score(game, state, player)
+        score = get_score(game, state, player)
+    else:
+        # recursion over all possible scores in next states
+        if state.SUPPORTS_PUSH:
+            scores = []
+            for move in state.get_possible_moves():
+                state.push(move)
+                scores.append(recursive_minimax_scores(game, state, player,
+                                                       table, stats, budget))
+                state.pop()
+        else:
+            scores = [recursive_minimax_scores(game, state.make_move(move),
+                                               player, table, stats, budget)
+                      for move in state.get_possible_moves()]
 
-    # recursion over all possible scores in next states
-    scores = [recursive_minimax_scores(game, state.make_move(move), player)
-              for move in state.get_possible_moves()]
+        if state.get_current_player_name() == player:
+            score = max(scores)
+        else:
+            score = min(scores)
 
-    if state.get_current_player_name() == player:
-        return max(scores)
-    return min(scores)
+    if table is not None:
+        table.put(key, score)
+    return score
 
 
+@instrumented
 def recursive_minimax(game: 'Game') -> Any:
     """ Find the best possible move recursively
     """
     state = game.current_state
+    player = state.get_current_player_name()
+    table = get_transposition_table(game)
+    stats = _start_search(game)
     moves = [(move, recursive_minimax_scores(game, state.make_move(move),
-                                             state.get_current_player_name()))
-             for move in state.get_possible_moves()]
+                                             player, table, stats))
+             for move in distinct_moves(state)]
     # find best move:
     best_move = None
     top_score = -2
@@ -103,82 +486,311 @@ def recursive_minimax(game: 'Game') -> Any:
     return best_move
 
 
-# Iterative Strategy:
+def alphabeta_scores(game: 'Game', state: 'GameState', player: str,
+                     alpha: int, beta: int,
+                     table: Optional[TranspositionTable] = None,
+                     stats: Optional[SearchStats] = None) -> int:
+    """ Return the minimax score of state for player, searching only inside
+        the window [alpha, beta].
 
+        A score outside the window is only a bound on the real score, which is
+        enough for the caller to know that this state will not be picked.
+    """
+    if stats is not None:
+        stats.nodes += 1
+    key = None
+    if table is not None:
+        key = (state.canonical_key(), player)
+        score = table.get(key)
+        if score is not None:
+            return score
 
-class GameTreeNode(object):
-    """ Class of GameTree with state as nodes
+    if game.is_over(state):
+        score = get_score(game, state, player)
+    else:
+        maximizing = state.get_current_player_name() == player
+        low, high = alpha, beta
+        score = -2 if maximizing else 2
+        in_place = state.SUPPORTS_PUSH
+        for move in state.get_possible_moves():
+            if in_place:
+                state.push(move)
+                child_score = alphabeta_scores(game, state, player,
+                                               low, high, table, stats)
+                state.pop()
+            else:
+                child_score = alphabeta_scores(game, state.make_move(move),
+                                               player, low, high, table, stats)
+            if maximizing:
+                score = max(score, child_score)
+                low = max(low, score)
+            else:
+                score = min(score, child_score)
+                high = min(high, score)
+            if low >= high:
+                break
+
+    if key is not None and _is_exact(score, alpha, beta):
+        table.put(key, score)
+    return score
+
+
+@instrumented
+def recursive_minimax_alphabeta(game: 'Game') -> Any:
+    """ Find the same move as recursive_minimax, skipping the parts of the game
+        tree that cannot change the result.
     """
-    def __init__(self, game: Game, state: GameState, player: str):
-        """ A Tree class with game state as nodes
-        """
-        self.game = game
-        self.state = state
-        self.player = player
+    state = game.current_state
+    player = state.get_current_player_name()
+    table = get_transposition_table(game)
+    stats = _start_search(game)
 
-    def children(self) -> List['GameTreeNode']:
-        """ Return a list of children states from a node
-        """
-        return [GameTreeNode(self.game, self.state.make_move(move), self.player)
-                for move in self.state.get_possible_moves()]
+    best_move = None
+    top_score = -2
+    for move in distinct_moves(state):
+        score = alphabeta_scores(game, state.make_move(move), player,
+                                 GameState.LOSE, GameState.WIN, table, stats)
+        if score > top_score:
+            best_move = move
+            top_score = score
+        if top_score >= GameState.WIN:
+            break
+    return best_move
 
-    def get_score(self, evaluated_state: Dict[str, int]) -> Any:
-        """ Get the score of the state if it is evaluted and add too the stack
-            (evaluated_state) If the children are not evaluated dont do anything
-            After adding to the stack return the score that will maximize
-            chance of wining for the player
-        """
-        children = self.children()
-        scores = []
-        for child in children:
-            if str(child.state) not in evaluated_state:
-                return None
-            else:
-                scores.append(evaluated_state[str(child.state)])
-        scores.sort()
-        if self.state.get_current_player_name() == self.player:
-            return scores[-1]
-        return scores[0]
 
+def depth_limited_scores(game: 'Game', state: 'GameState', player: str,
+                         depth: int, alpha: float, beta: float,
+                         budget: SearchBudget, stats: SearchStats) -> float:
+    """ Return the alpha-beta score of state for player, looking at most depth
+        moves ahead.
 
-def _evaluate_and_add(node: GameTreeNode, stack: List[GameTreeNode],
-                      evaluated_state: Dict[str, int]):
-    """ If the node had been evaluated get the score of the game and assign
-        it to the according key in the stack
+        States at the depth limit are scored with rough_outcome(), so the
+        score is a guess rather than a proven WIN or LOSE. Raise
+        SearchTimeout if budget runs out, leaving state with any moves pushed
+        on it still applied.
     """
-    if node.game.is_over(node.state):
-        score = get_score(node.game, node.state, node.player)
-        evaluated_state[str(node.state)] = score
-    else:
-        score = node.get_score(evaluated_state)
+    budget.spend(stats)
+    if game.is_over(state):
+        return get_score(game, state, player)
+    if depth == 0:
+        budget.cutoff = True
+        guess = state.rough_outcome()
+        if state.get_current_player_name() == player:
+            return guess
+        return -guess
+
+    maximizing = state.get_current_player_name() == player
+    score = -2 if maximizing else 2
+    in_place = state.SUPPORTS_PUSH
+    for move in state.get_possible_moves():
+        if in_place:
+            state.push(move)
+            child_score = depth_limited_scores(game, state, player, depth - 1,
+                                               alpha, beta, budget, stats)
+            state.pop()
+        else:
+            child_score = depth_limited_scores(game, state.make_move(move),
+                                               player, depth - 1, alpha, beta,
+                                               budget, stats)
+        if maximizing:
+            score = max(score, child_score)
+            alpha = max(alpha, score)
+        else:
+            score = min(score, child_score)
+            beta = min(beta, score)
+        if alpha >= beta:
+            break
+    return score
+
+
+@instrumented
+def iterative_deepening(game: Any, time_limit: Optional[float] =
+                        DEFAULT_MOVE_TIME,
+                        max_nodes: Optional[int] = None) -> Any:
+    """ Return the best move for game found by searching one move deeper at a
+        time until time_limit seconds pass or max_nodes states are visited.
+
+        The move comes from the deepest search that finished, or is the first
+        possible move if not even the first search did. The depth reached and
+        the states visited are left in game.search_stats. Use
+        functools.partial to register this strategy with another budget.
+    """
+    state = game.current_state
+    player = state.get_current_player_name()
+    stats = _start_search(game)
+    budget = SearchBudget(time_limit, max_nodes)
+    moves = distinct_moves(state)
+    best_move = moves[0] if moves else None
+
+    depth = 0
+    try:
+        while True:
+            budget.cutoff = False
+            # Search the best move so far first, so it prunes the most.
+            ordered = [best_move] + [move for move in moves
+                                     if move != best_move]
+            found = None
+            top_score = -2
+            for move in ordered:
+                score = depth_limited_scores(game, state.make_move(move),
+                                             player, depth, top_score,
+                                             GameState.WIN, budget, stats)
+                if score > top_score:
+                    found = move
+                    top_score = score
+            best_move = found
+            stats.depth = depth + 1
+            if not budget.cutoff or top_score >= GameState.WIN:
+                break
+            depth += 1
+    except SearchTimeout:
+        pass
+    return best_move
+
+
+# Iterative Strategy:
+
+
+def _enter_node(game: 'Game', state: 'GameState', player: str, alpha: int,
+                beta: int, table: Optional[TranspositionTable],
+                stats: SearchStats) -> Any:
+    """ Visit state during an iterative search.
+
+        Return its score if it is known without searching below it, or
+        otherwise a new frame [state, moves, score, alpha, beta, key,
+        maximizing] to be pushed on the search stack.
+    """
+    stats.nodes += 1
+    key = None
+    if table is not None:
+        key = (state.canonical_key(), player)
+        score = table.get(key)
         if score is not None:
-            evaluated_state[str(node.state)] = score
+            return score
+    if game.is_over(state):
+        score = get_score(game, state, player)
+        if key is not None:
+            table.put(key, score)
+        return score
+    maximizing = state.get_current_player_name() == player
+    return [state, iter(state.get_possible_moves()), -2 if maximizing else 2,
+            alpha, beta, key, maximizing]
+
+
+def iterative_minimax_scores(game: 'Game', state: 'GameState', player: str,
+                             table: Optional[TranspositionTable],
+                             stats: SearchStats,
+                             window: Optional[tuple] = None) -> int:
+    """ Return the minimax score of state for player, using an explicit stack
+        of frames instead of recursion.
+
+        If window is an (alpha, beta) pair, the search is pruned to that
+        window and returns the same score as alphabeta_scores; otherwise every
+        child of every state is searched.
+
+        Each frame holds a state, an iterator over its remaining moves and the
+        best score seen so far, so every child is generated exactly once and
+        the stack only grows with the depth of the game.
+
+        States that support push and pop are searched in place: every frame
+        then refers to state itself, and leaving a frame pops its move.
+    """
+    prune = window is not None
+    alpha, beta = window if prune else (-2, 2)
+    entered = _enter_node(game, state, player, alpha, beta, table, stats)
+    if not isinstance(entered, list):
+        return entered
+    in_place = state.SUPPORTS_PUSH
+
+    stack = [entered]
+    result = None
+    while stack:
+        frame = stack[-1]
+        # frame: [state, moves, score, alpha, beta, key, maximizing]
+        if result is not None:
+            if frame[6]:
+                frame[2] = max(frame[2], result)
+            else:
+                frame[2] = min(frame[2], result)
+            result = None
+        low, high = frame[3], frame[4]
+        if prune:
+            if frame[6]:
+                low = max(low, frame[2])
+            else:
+                high = min(high, frame[2])
+        move = next(frame[1], None) if low < high else None
+
+        if move is None:
+            # All children are searched, or the rest cannot matter.
+            stack.pop()
+            result = frame[2]
+            if frame[5] is not None and _is_exact(result, frame[3], frame[4]):
+                table.put(frame[5], result)
+            if in_place and stack:
+                state.pop()
+            continue
+
+        if in_place:
+            state.push(move)
+            child = state
         else:
-            stack.append(node)
+            child = frame[0].make_move(move)
+        entered = _enter_node(game, child, player, low, high, table, stats)
+        if isinstance(entered, list):
+            stack.append(entered)
+        else:
+            result = entered
+            if in_place:
+                state.pop()
+    return result
 
 
+@instrumented
 def iterative_minimax_strategy(game: Any) -> Any:
     """ Iterative minimax strategy for game
     """
     state = game.current_state
     player = state.get_current_player_name()
-    moves = [(move, GameTreeNode(game, state.make_move(move), player))
-             for move in state.get_possible_moves()]
-    stack = [move[1] for move in moves]
-    evaluated_state = {}  # game state string: score
-
-    stack_length = len(stack)
-    while stack_length > 0:
-        node = stack.pop()
-        _evaluate_and_add(node, stack, evaluated_state)
-
-        not_evaluated = [n for n in node.children() if str(n.state)
-                         not in evaluated_state]
-        for n in not_evaluated:
-            _evaluate_and_add(n, stack, evaluated_state)
-
-    moves.sort(key=lambda item: evaluated_state[str(item[1].state)])
-    return moves[-1][0]
+    table = get_transposition_table(game)
+    stats = _start_search(game)
+
+    best_move = None
+    top_score = -2
+    for move in distinct_moves(state, True):
+        score = iterative_minimax_scores(game, state.make_move(move), player,
+                                         table, stats)
+        # ties go to the last move with the top score
+        if score >= top_score:
+            best_move = move
+            top_score = score
+    return best_move
+
+
+@instrumented
+def iterative_minimax_alphabeta(game: Any) -> Any:
+    """ Find the same move as iterative_minimax_strategy, skipping the parts of
+        the game tree that cannot change the result.
+    """
+    state = game.current_state
+    player = state.get_current_player_name()
+    table = get_transposition_table(game)
+    stats = _start_search(game)
+
+    # iterative_minimax_strategy settles ties on the last move with the top
+    # score, so look at the moves from the end.
+    best_move = None
+    top_score = -2
+    for move in reversed(distinct_moves(state, True)):
+        score = iterative_minimax_scores(game, state.make_move(move), player,
+                                         table, stats,
+                                         (GameState.LOSE, GameState.WIN))
+        if score > top_score:
+            best_move = move
+            top_score = score
+        if top_score >= GameState.WIN:
+            break
+    return best_move
 
 
 if __name__ == "__main__":
@@ -0,0 +1,345 @@
+"""
+A solver for SubtractSquare that knows the outcome of every total.
+
+A total is losing for the player about to move if every square they can
+subtract leaves a winning total for their opponent, and 0 is losing since
+the previous player just won. The solver sieves forward from each losing
+total, marking every total a square above it as winning, and keeps the result
+as one bit per total. The table can be memory-mapped from a file so it is
+only ever computed once, and it grows on demand when a larger total is asked
+for. The shared solver's file is TABLE_PATH unless the SUBTRACT_SQUARE_TABLE
+environment variable names another.
+
+Any number of processes can share one table file. It is only grown while
+holding an exclusive lock on it, by whichever process first needs more
+totals, and it is never truncated or shrunk, so the maps of the other
+processes stay valid; they pick up the new totals from the header the next
+time they need to grow. A file at the table's path that is not a table is
+never written to, and neither is a symbolic link, so a mistyped or planted
+path cannot make the solver overwrite another file.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import mmap
+import os
+import struct
+import tempfile
+from math import isqrt
+from typing import Any, List, Optional
+
+from subtract_square_game import SubtractSquareGame
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+TABLE_PATH = os.path.join(tempfile.gettempdir(), 'subtract_square_table.bin')
+TABLE_ENV = 'SUBTRACT_SQUARE_TABLE'
+MIN_TOTALS = 1 << 16
+
+_MAGIC = b'SUBSQ001'
+_HEADER = struct.Struct('<8sQ')
+
+
+class SubtractSquareSolver:
+    """
+    A table of which SubtractSquare totals are winning for the player about
+    to move.
+
+    path - the file the table is memory-mapped from, or None to keep it in
+           memory only
+    totals - the number of totals, 0 up to totals - 1, that are solved
+    """
+    path: Optional[str]
+    totals: int
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Initialize a solver backed by the file at path, reading the totals
+        already solved in it, or an in-memory solver if path is None.
+
+        >>> solver = SubtractSquareSolver()
+        >>> solver.totals
+        0
+        """
+        self.path = path
+        self.totals = 0
+        self._file = None
+        self._bits = bytearray()
+        self._losing = []
+        if path is not None and os.path.exists(path):
+            self._open_file()
+            self._lock(False)
+            try:
+                self._load()
+            finally:
+                self._unlock()
+
+    def _open_file(self) -> None:
+        """
+        Open the table file for reading and writing, creating it if it does
+        not exist but never truncating it or following a symbolic link.
+        """
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0)
+        self._file = os.fdopen(os.open(self.path, flags, 0o644), 'r+b')
+
+    def _lock(self, exclusive: bool) -> None:
+        """
+        Wait for an exclusive lock on the table file if exclusive, or else a
+        shared one. Without fcntl the file is not locked.
+        """
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(),
+                        fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _unlock(self) -> None:
+        """
+        Release the lock on the table file.
+        """
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _load(self) -> None:
+        """
+        Map the whole table file and read the totals solved in it, if it has
+        solved more than this solver knows of. An empty file, or one whose
+        first growth was never finished, has no totals solved.
+
+        Raise ValueError if the file is not a table.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        totals = 0
+        if size > 0:
+            header = os.pread(self._file.fileno(), _HEADER.size, 0)
+            if len(header) < _HEADER.size:
+                raise ValueError("{} is not a SubtractSquare table."
+                                 .format(self.path))
+            magic, solved = _HEADER.unpack(header)
+            if magic == _MAGIC and size >= _HEADER.size + _bytes_for(solved):
+                totals = solved
+            elif header != bytes(_HEADER.size):
+                raise ValueError("{} is not a SubtractSquare table."
+                                 .format(self.path))
+        if totals <= self.totals:
+            return
+        self._map(size)
+        self.totals = totals
+        self._losing = self._read_losing()
+
+    def _map(self, size: int) -> None:
+        """
+        Memory-map the first size bytes of the table file in place of any
+        earlier map.
+        """
+        if isinstance(self._bits, mmap.mmap):
+            self._bits.close()
+        self._bits = mmap.mmap(self._file.fileno(), size)
+
+    def _read_losing(self) -> List[int]:
+        """
+        Return every losing total in the table, in increasing order.
+        """
+        losing = []
+        bits = self._bits
+        offset = self._offset()
+        for index in range(_bytes_for(self.totals)):
+            byte = bits[offset + index]
+            if byte != 0xFF:
+                for bit in range(8):
+                    total = index * 8 + bit
+                    if total < self.totals and not byte >> bit & 1:
+                        losing.append(total)
+        return losing
+
+    def close(self) -> None:
+        """
+        Release the memory map and file of this solver, if it has them.
+        """
+        if self._file is not None:
+            if isinstance(self._bits, mmap.mmap):
+                self._bits.close()
+            self._file.close()
+            self._file = None
+            self._bits = bytearray()
+            self.totals = 0
+            self._losing = []
+
+    def _offset(self) -> int:
+        """
+        Return where the bits start in the underlying storage.
+        """
+        return _HEADER.size if self._file is not None else 0
+
+    def ensure(self, total: int) -> None:
+        """
+        Make sure every total up to and including total is solved, at least
+        doubling the table when it has to grow.
+
+        >>> solver = SubtractSquareSolver()
+        >>> solver.ensure(10)
+        >>> solver.totals >= 11
+        True
+        """
+        if total < self.totals:
+            return
+        self._grow(max(total + 1, 2 * self.totals, MIN_TOTALS))
+
+    def _grow(self, totals: int) -> None:
+        """
+        Extend the table so that it solves totals 0 up to totals - 1, or
+        more if another process sharing its file already has.
+        """
+        if self.path is None:
+            self._bits.extend(bytes(_bytes_for(totals) - len(self._bits)))
+            self._solve(totals)
+            return
+        if self._file is None:
+            self._open_file()
+        self._lock(True)
+        try:
+            self._load()
+            if totals > self.totals:
+                self._resize(totals)
+                self._solve(totals)
+        finally:
+            self._unlock()
+
+    def _solve(self, totals: int) -> None:
+        """
+        Solve the totals from self.totals up to totals - 1, which there is
+        already room for.
+        """
+        old_totals = self.totals
+        bits = self._bits
+        offset = self._offset()
+
+        # Totals that old losing totals reach in the new range are winning.
+        for losing in self._losing:
+            root = isqrt(old_totals - losing - 1) + 1
+            square = root * root
+            while losing + square < totals:
+                target = losing + square
+                bits[offset + (target >> 3)] |= 1 << (target & 7)
+                root += 1
+                square = root * root
+
+        for total in range(old_totals, totals):
+            if bits[offset + (total >> 3)] >> (total & 7) & 1:
+                continue
+            self._losing.append(total)
+            root = 1
+            while total + root * root < totals:
+                target = total + root * root
+                bits[offset + (target >> 3)] |= 1 << (target & 7)
+                root += 1
+
+        self.totals = totals
+        if self._file is not None:
+            bits[:_HEADER.size] = _HEADER.pack(_MAGIC, totals)
+            bits.flush()
+
+    def _resize(self, totals: int) -> None:
+        """
+        Make room in the table file for the bits of totals totals, holding
+        its exclusive lock. The file only ever gets longer.
+
+        Bits past the totals solved can only have been set by a process that
+        stopped while growing the table, and every bit it set is a total that
+        is winning, so they are kept; a table with no totals solved yet is
+        cleared instead.
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        needed = _HEADER.size + _bytes_for(totals)
+        if size < needed:
+            self._file.truncate(needed)
+        self._map(max(size, needed))
+        if self.totals == 0:
+            self._bits[:] = bytes(len(self._bits))
+
+    def is_winning(self, total: int) -> bool:
+        """
+        Return whether total is winning for the player about to move.
+
+        >>> solver = SubtractSquareSolver()
+        >>> [total for total in range(20) if not solver.is_winning(total)]
+        [0, 2, 5, 7, 10, 12, 15, 17]
+        """
+        self.ensure(total)
+        return bool(self._bits[self._offset() + (total >> 3)] >>
+                    (total & 7) & 1)
+
+    def best_move(self, total: int) -> int:
+        """
+        Return the smallest square that leaves the opponent a losing total,
+        or 1 if there is none, which is the move recursive_minimax picks.
+
+        >>> solver = SubtractSquareSolver()
+        >>> solver.best_move(18), solver.best_move(17)
+        (1, 1)
+        >>> solver.best_move(4)
+        4
+        """
+        self.ensure(total)
+        bits = self._bits
+        offset = self._offset()
+        root = 1
+        while root * root <= total:
+            left = total - root * root
+            if not bits[offset + (left >> 3)] >> (left & 7) & 1:
+                return root * root
+            root += 1
+        return 1
+
+
+def _bytes_for(totals: int) -> int:
+    """
+    Return the number of bytes holding one bit for each of totals totals.
+
+    >>> _bytes_for(0), _bytes_for(8), _bytes_for(9)
+    (0, 1, 2)
+    """
+    return (totals + 7) // 8
+
+
+_SOLVER = None
+
+
+def table_path() -> str:
+    """
+    Return the file the shared solver is backed by: the one named by the
+    TABLE_ENV environment variable if it is set, or else TABLE_PATH.
+
+    Worker processes inherit the environment however they are started, so
+    setting TABLE_ENV points their solvers at the same file.
+    """
+    return os.environ.get(TABLE_ENV) or TABLE_PATH
+
+
+def get_solver() -> SubtractSquareSolver:
+    """
+    Return the shared solver backed by the file at table_path(), reopening
+    it if that file has changed since it was last returned.
+    """
+    global _SOLVER
+    path = table_path()
+    if _SOLVER is None or _SOLVER.path != path:
+        if _SOLVER is not None:
+            _SOLVER.close()
+        _SOLVER = SubtractSquareSolver(path)
+    return _SOLVER
+
+
+def subtract_square_solver_strategy(game: Any) -> Any:
+    """
+    Return the same move as recursive_minimax on a game of SubtractSquare,
+    looked up in the shared solver table.
+    """
+    if not isinstance(game, SubtractSquareGame):
+        raise ValueError("This strategy can only play SubtractSquare.")
+    return get_solver().best_move(game.current_state.current_total)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
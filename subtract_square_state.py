@@ -3,14 +3,29 @@ An implementation of a state for SubtractSquare.
 
 NOTE: You do not have to run python-ta on this file.
 """
-from typing import Any
+from bisect import bisect_right
+from math import isqrt
+from typing import Any, List
 from game_state import GameState
+from zobrist import TURN_KEY, mix
+
+# The squares 1, 4, 9, ... found so far, grown as larger totals come up
+_SQUARES = [1]
+
+# The rough outcome of each total seen; it is emptied whenever it holds
+# ROUGH_OUTCOME_MEMO_SIZE of them.
+ROUGH_OUTCOME_MEMO_SIZE = 1 << 16
+_ROUGH_OUTCOMES = {}
 
 
 class SubtractSquareState(GameState):
     """
     The state of a game at a certain point in time.
+
+    zobrist - the Zobrist hash of the current total and the current player
     """
+    SUPPORTS_PUSH: bool = True
+    zobrist: int
 
     def __init__(self, is_p1_turn: bool, current_total: int) -> None:
         """
@@ -19,6 +34,8 @@ class SubtractSquareState(GameState):
         """
         super().__init__(is_p1_turn)
         self.current_total = current_total
+        self.zobrist = mix(current_total) ^ (TURN_KEY if is_p1_turn else 0)
+        self._pushed = None
 
     def __str__(self) -> str:
         """
@@ -30,12 +47,7 @@ class SubtractSquareState(GameState):
         """
         Return all possible moves that can be applied to this state.
         """
-        moves = []
-        for i in range(1, self.current_total + 1):
-            if i ** 2 <= self.current_total:
-                moves.append(i ** 2)
-
-        return moves
+        return squares_up_to(self.current_total)
 
     def make_move(self, move: Any) -> "SubtractSquareState":
         """
@@ -48,6 +60,37 @@ class SubtractSquareState(GameState):
                                         self.current_total - move)
         return new_state
 
+    def push(self, move: Any) -> None:
+        """
+        Apply move to this state in place, so that pop() can undo it.
+
+        >>> s = SubtractSquareState(True, 10)
+        >>> s.push(9)
+        >>> s
+        P1's Turn: False - Total: 1
+        >>> s.pop()
+        >>> s
+        P1's Turn: True - Total: 10
+        """
+        if type(move) == str:
+            move = int(move)
+        if self._pushed is None:
+            self._pushed = []
+        self._pushed.append(move)
+        self.zobrist ^= mix(self.current_total) ^ TURN_KEY
+        self.current_total -= move
+        self.zobrist ^= mix(self.current_total)
+        self.p1_turn = not self.p1_turn
+
+    def pop(self) -> None:
+        """
+        Undo the most recent push() that has not been undone yet.
+        """
+        self.zobrist ^= mix(self.current_total) ^ TURN_KEY
+        self.current_total += self._pushed.pop()
+        self.zobrist ^= mix(self.current_total)
+        self.p1_turn = not self.p1_turn
+
     def __repr__(self) -> str:
         """
         Return a representation of this state (which can be used for
@@ -56,19 +99,73 @@ class SubtractSquareState(GameState):
         return "P1's Turn: {} - Total: {}".format(self.p1_turn,
                                                   self.current_total)
 
+    def state_key(self) -> int:
+        """
+        Return the 64-bit Zobrist hash of this state, for use in caches.
+
+        >>> s = SubtractSquareState(True, 9)
+        >>> s.state_key() == SubtractSquareState(True, 9).state_key()
+        True
+        >>> s.state_key() == SubtractSquareState(False, 9).state_key()
+        False
+        """
+        return self.zobrist
+
     def rough_outcome(self) -> float:
         """
         Return an estimate in interval [LOSE, WIN] of best outcome the current
         player can guarantee from state self.
+
+        It is worked out once for each total, which is all it depends on.
+
+        >>> SubtractSquareState(True, 9).rough_outcome()
+        1
+        >>> SubtractSquareState(False, 5).rough_outcome()
+        -1
+        >>> SubtractSquareState(True, 3).rough_outcome()
+        0
         """
-        if is_pos_square(self.current_total):
-            return self.WIN
-        elif all([is_pos_square(self.current_total - n ** 2)
-                  for n in range(1, self.current_total + 1)
-                  if n ** 2 < self.current_total]):
-            return self.LOSE
+        total = self.current_total
+        outcome = _ROUGH_OUTCOMES.get(total)
+        if outcome is None:
+            if is_pos_square(total):
+                outcome = self.WIN
+            elif all(is_pos_square(total - square)
+                     for square in squares_up_to(total - 1)):
+                outcome = self.LOSE
+            else:
+                outcome = self.DRAW
+            if len(_ROUGH_OUTCOMES) >= ROUGH_OUTCOME_MEMO_SIZE:
+                _ROUGH_OUTCOMES.clear()
+            _ROUGH_OUTCOMES[total] = outcome
+        return outcome
+
+
+def clear_rough_outcomes() -> None:
+    """
+    Forget every rough outcome remembered so far, so that the next ones are
+    all worked out again.
 
-        return self.DRAW
+    >>> _ = SubtractSquareState(True, 10).rough_outcome()
+    >>> clear_rough_outcomes()
+    >>> len(_ROUGH_OUTCOMES)
+    0
+    """
+    _ROUGH_OUTCOMES.clear()
+
+
+def squares_up_to(total: int) -> List[int]:
+    """
+    Return the positive squares no greater than total, smallest first.
+
+    >>> squares_up_to(10)
+    [1, 4, 9]
+    >>> squares_up_to(0)
+    []
+    """
+    while _SQUARES[-1] < total:
+        _SQUARES.append((len(_SQUARES) + 1) ** 2)
+    return _SQUARES[:bisect_right(_SQUARES, total)]
 
 
 def is_pos_square(n: int) -> bool:
@@ -80,7 +177,7 @@ def is_pos_square(n: int) -> bool:
     >>> is_pos_square(9)
     True
     """
-    return 0 < n and (round(n ** 0.5) ** 2 == n)
+    return 0 < n and isqrt(n) ** 2 == n
 
 
 if __name__ == "__main__":
@@ -265,6 +265,27 @@ class SubtractSquareUnitTests(unittest.TestCase):
                          "After calling make_move, the current_state of a " +
                          "game should not be changed.")
 
+    def test_large_total(self):
+        """
+        Test that the moves and rough outcome of a game with a total past a
+        million are found, and that the moves of a larger game do not change
+        those of a smaller one.
+        """
+        with patch('builtins.input', return_value=str(10 ** 6 + 5)):
+            game = SubtractSquareGame(True)
+        state = game.current_state
+        moves = state.get_possible_moves()
+        self.assertEqual(len(moves), 1000)
+        self.assertEqual(moves[-1], 10 ** 6)
+        moves.append(0)
+        self.assertEqual(state.get_possible_moves()[-1], 10 ** 6)
+        self.assertEqual(state.make_move(10 ** 6).rough_outcome(), -1)
+        self.assertEqual(state.rough_outcome(), 0)
+
+        with patch('builtins.input', return_value=str(17)):
+            small = SubtractSquareGame(True).current_state
+        self.assertEqual(small.get_possible_moves(), [1, 4, 9, 16])
+
     @patch('builtins.input', side_effect=['20'])
     def test_subtractsquare_is_valid_move_true(self, input):
         """
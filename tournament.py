@@ -0,0 +1,261 @@
+"""
+A round-robin tournament between the strategies in usable_strategies.
+
+Every pair of strategies plays every game in playable_games at each of its
+settings in GAME_SETTINGS, once with each strategy as Player 1. Player 1
+always moves first, so a pair plays the same position from both sides.
+Matches are played by a SelfPlayRunner in a pool of processes, and for each
+game and setting every strategy gets:
+
+    games, wins, losses, draws - its record, where games stopped after
+                                 max_moves moves are draws
+    win_rate - the fraction of its games it won
+    elo - its Elo rating, starting from INITIAL_ELO, after all its games
+    mean_time, p95_time, p99_time - the seconds it took per move
+    mean_nodes - the mean number of states it searched per move, or None if
+                 it does not search
+
+Strategies that cannot play a game are left out of its matches, see
+EXCLUDED_STRATEGIES, and so are those in PARALLEL_STRATEGIES when matches
+are played in a pool of processes.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import json
+import math
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from game_interface import playable_games, unusable_strategies, \
+    usable_strategies
+from selfplay import SelfPlayRunner
+
+REPORT_PATH = 'tournament_report.json'
+SUMMARY_PATH = 'tournament_summary.txt'
+DEFAULT_ROUNDS = 1
+DEFAULT_MAX_MOVES = 100
+INITIAL_ELO = 1500
+ELO_K = 32
+
+# the game options of each setting a game is played at
+GAME_SETTINGS = {'s': [{'count': 10}, {'count': 20}, {'count': 40}],
+                 'h': [{'side_length': 1}, {'side_length': 2}],
+                 'c': [{}]}
+
+# 'i' needs a person to play, and the others cannot play the game at all
+EXCLUDED_STRATEGIES = {key: {'i'} | unusable_strategies[key]
+                       for key in unusable_strategies}
+
+# strategies that start a pool of worker processes of their own, which
+# would be nested in every worker of the tournament's pool and oversubscribe
+# the CPUs
+PARALLEL_STRATEGIES = {'mp'}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Return the nearest-rank percentile fraction of values, which is not
+    empty.
+
+    >>> percentile([4, 1, 3, 2], 0.5)
+    2
+    >>> percentile([4, 1, 3, 2], 0.99)
+    4
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def expected_score(rating: float, other: float) -> float:
+    """
+    Return the score a player rated rating is expected to get against a
+    player rated other, between 0 and 1.
+
+    >>> expected_score(1500, 1500)
+    0.5
+    >>> round(expected_score(1900, 1500), 2)
+    0.91
+    """
+    return 1 / (1 + 10 ** ((other - rating) / 400))
+
+
+def _play_match(game_key: str, options: Dict[str, Any], p1_key: str,
+                p2_key: str, rounds: int,
+                max_moves: int) -> List[Dict[str, Any]]:
+    """
+    Play rounds games of playable_games[game_key] with options between the
+    strategies p1_key and p2_key, and return their results.
+
+    The strategies are passed by key and looked up here, so that only their
+    names need to be sent to a worker process.
+    """
+    runner = SelfPlayRunner(playable_games[game_key],
+                            usable_strategies[p1_key],
+                            usable_strategies[p2_key], True, options,
+                            max_moves)
+    return [runner.play_game(index) for index in range(rounds)]
+
+
+def _matches(game_key: str, strategies: List[str],
+             in_pool: bool) -> List[tuple]:
+    """
+    Return every ordered pair of the strategies that can play game_key, in
+    a pool of processes if in_pool.
+    """
+    excluded = EXCLUDED_STRATEGIES.get(game_key, set())
+    if in_pool:
+        excluded = excluded | PARALLEL_STRATEGIES
+    players = [key for key in strategies if key not in excluded]
+    return [(p1, p2) for p1 in players for p2 in players if p1 != p2]
+
+
+def _summarize(pairs: List[tuple],
+               results: List[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Return the record, Elo rating and move costs of each strategy, given the
+    results of the games played by each pair of pairs.
+
+    Elo ratings are updated after every game, in the order they were played.
+    """
+    records = {}
+    for pair in pairs:
+        for key in pair:
+            records.setdefault(key, {'games': 0, 'wins': 0, 'losses': 0,
+                                     'draws': 0, 'elo': INITIAL_ELO,
+                                     'times': [], 'nodes': []})
+
+    for (p1, p2), games in zip(pairs, results):
+        for game in games:
+            for index, (latency, nodes) in enumerate(zip(game['latencies'],
+                                                         game['nodes'])):
+                # Player 1 moves first, so it makes the even moves.
+                record = records[p1 if index % 2 == 0 else p2]
+                record['times'].append(latency)
+                if nodes is not None:
+                    record['nodes'].append(nodes)
+
+            score = {'p1': 1, 'p2': 0, None: 0.5}[game['winner']]
+            expected = expected_score(records[p1]['elo'], records[p2]['elo'])
+            records[p1]['elo'] += ELO_K * (score - expected)
+            records[p2]['elo'] -= ELO_K * (score - expected)
+            for key, points in [(p1, score), (p2, 1 - score)]:
+                records[key]['games'] += 1
+                records[key][{1: 'wins', 0: 'losses',
+                              0.5: 'draws'}[points]] += 1
+
+    summary = {}
+    for key, record in records.items():
+        times, nodes = record['times'], record['nodes']
+        summary[key] = {
+            'games': record['games'], 'wins': record['wins'],
+            'losses': record['losses'], 'draws': record['draws'],
+            'win_rate': record['wins'] / record['games'],
+            'elo': round(record['elo'], 1),
+            'mean_time': sum(times) / len(times) if times else None,
+            'p95_time': percentile(times, 0.95) if times else None,
+            'p99_time': percentile(times, 0.99) if times else None,
+            'mean_nodes': sum(nodes) / len(nodes) if nodes else None}
+    return summary
+
+
+def run_tournament(strategies: Optional[List[str]] = None,
+                   games: Optional[List[str]] = None,
+                   settings: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                   rounds: int = DEFAULT_ROUNDS,
+                   max_moves: int = DEFAULT_MAX_MOVES,
+                   workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Play a round-robin tournament between the keys strategies of
+    usable_strategies on the keys games of playable_games, at the settings
+    of each game, and return its report. Each ordered pair of strategies
+    plays rounds games at every setting.
+
+    Matches are played in up to workers processes, leaving out
+    PARALLEL_STRATEGIES, or in this process if workers is 1.
+    """
+    strategies = list(strategies or usable_strategies)
+    games = list(games or playable_games)
+    settings = settings or GAME_SETTINGS
+
+    matches = []
+    for game_key in games:
+        for options in settings.get(game_key, [{}]):
+            for p1, p2 in _matches(game_key, strategies, workers != 1):
+                matches.append((game_key, options, p1, p2))
+
+    if workers == 1:
+        results = [_play_match(*match, rounds, max_moves)
+                   for match in matches]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_play_match, *match, rounds, max_moves)
+                       for match in matches]
+            results = [future.result() for future in futures]
+
+    report = {'rounds': rounds, 'max_moves': max_moves, 'settings': []}
+    for game_key in games:
+        for options in settings.get(game_key, [{}]):
+            played = [(match[2:], result)
+                      for match, result in zip(matches, results)
+                      if match[0] == game_key and match[1] == options]
+            if not played:
+                continue
+            pairs, match_results = zip(*played)
+            report['settings'].append({
+                'game': game_key,
+                'name': playable_games[game_key].__name__,
+                'options': options,
+                'strategies': _summarize(list(pairs), list(match_results))})
+    return report
+
+
+def format_table(report: Dict[str, Any]) -> str:
+    """
+    Return a table of the strategies at each setting of report, from the
+    highest Elo rating to the lowest, with times in milliseconds.
+    """
+    lines = []
+    row = '{:<6}{:>8}{:>8}{:>12}{:>10}{:>10}{:>10}{:>12}'
+    for setting in report['settings']:
+        options = ', '.join('{}={}'.format(name, value)
+                            for name, value in sorted(setting['options']
+                                                      .items()))
+        lines.append('{} {}'.format(setting['name'], options).rstrip())
+        lines.append(row.format('', 'elo', 'win %', 'W-L-D', 'mean ms',
+                                'p95 ms', 'p99 ms', 'nodes'))
+        ranked = sorted(setting['strategies'].items(),
+                        key=lambda item: (-item[1]['elo'], item[0]))
+        for key, stats in ranked:
+            times = ['-' if stats[name] is None else
+                     '{:.2f}'.format(stats[name] * 1000)
+                     for name in ['mean_time', 'p95_time', 'p99_time']]
+            nodes = '-' if stats['mean_nodes'] is None else \
+                '{:.0f}'.format(stats['mean_nodes'])
+            lines.append(row.format(
+                key, '{:.0f}'.format(stats['elo']),
+                '{:.0f}'.format(stats['win_rate'] * 100),
+                '{}-{}-{}'.format(stats['wins'], stats['losses'],
+                                  stats['draws']), *times, nodes))
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def main(arguments: List[str]) -> None:
+    """
+    Run a tournament from the command line: an optional number of rounds
+    followed by optional game keys, and write its report and summary.
+    """
+    rounds = int(arguments[0]) if arguments else DEFAULT_ROUNDS
+    report = run_tournament(games=arguments[1:] or None, rounds=rounds)
+    with open(REPORT_PATH, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    table = format_table(report)
+    with open(SUMMARY_PATH, 'w') as summary_file:
+        summary_file.write(table)
+    print(table)
+    print("Wrote {} and {}.".format(REPORT_PATH, SUMMARY_PATH))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
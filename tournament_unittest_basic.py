@@ -0,0 +1,66 @@
+"""
+Unittests for the round-robin tournament.
+"""
+import unittest
+from unittest.mock import patch
+
+from tournament import run_tournament, format_table, INITIAL_ELO
+from unittest_helpers import use_own_solver_table
+
+
+class TournamentUnitTests(unittest.TestCase):
+    def setUp(self):
+        use_own_solver_table(self)
+
+    def test_round_robin_report(self):
+        """
+        Test that every pair of strategies plays both sides of every setting,
+        that Elo ratings only move points between strategies, and that the
+        report records the cost of each strategy's moves.
+        """
+        strategies = ['ro', 'mra', 'ss', 'cs']
+        settings = {'s': [{'count': 10}, {'count': 18}]}
+        with patch('builtins.input', side_effect=AssertionError):
+            report = run_tournament(strategies, ['s'], settings, rounds=2,
+                                    workers=2)
+
+        self.assertEqual([setting['options'] for setting in
+                          report['settings']], settings['s'])
+        for setting in report['settings']:
+            results = setting['strategies']
+            # The Chopsticks solver cannot play Subtract Square.
+            self.assertEqual(sorted(results), ['mra', 'ro', 'ss'])
+            self.assertAlmostEqual(sum(stats['elo'] for stats in
+                                       results.values()),
+                                   3 * INITIAL_ELO, places=0)
+            for key, stats in results.items():
+                self.assertEqual(stats['games'], 2 * 2 * 2)
+                self.assertEqual(stats['wins'] + stats['losses'] +
+                                 stats['draws'], stats['games'])
+                self.assertLessEqual(stats['p95_time'], stats['p99_time'])
+            self.assertIsNone(results['ss']['mean_nodes'])
+            self.assertGreater(results['mra']['mean_nodes'], 0)
+
+        # 10 is a losing total for the first player and 18 a winning one, so
+        # the solver wins every game as Player 2 and as Player 1 respectively.
+        count_10, count_18 = [setting['strategies']
+                              for setting in report['settings']]
+        self.assertGreaterEqual(count_10['ss']['wins'], 4)
+        self.assertGreaterEqual(count_18['ss']['wins'], 4)
+        self.assertIn('SubtractSquareGame count=10', format_table(report))
+
+    def test_parallel_strategies_only_inline(self):
+        """
+        Test that strategies with worker processes of their own only play
+        when matches are not played in worker processes.
+        """
+        settings = {'s': [{'count': 10}]}
+        for workers, players in [(2, ['ro']), (1, ['mp', 'ro'])]:
+            report = run_tournament(['ro', 'mp', 'ss'], ['s'], settings,
+                                    workers=workers)
+            results = report['settings'][0]['strategies']
+            self.assertEqual(sorted(results), players + ['ss'])
+
+
+if __name__ == "__main__":
+    unittest.main()
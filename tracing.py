@@ -0,0 +1,194 @@
+"""
+Per-turn latency tracing for GameInterface.
+
+Every turn of a game is a TurnSpan: the time spent asking the player's
+strategy for a move, checking that the move is valid and applying it, along
+with how many invalid moves the strategy picked first. A TurnTracer writes
+each span to a file as soon as the turn is over, in one of two formats:
+
+    'jsonl' - one line of JSON per turn:
+              {"turn": 0, "player": "p1", "move": 4, "start": 0.0,
+               "duration": 0.012, "strategy_time": 0.011,
+               "validation_time": 0.0001, "apply_time": 0.0002,
+               "invalid_retries": 0, "nodes": 42}
+    'chrome' - the JSON array of Chrome trace events, with one event for
+               the turn and one nested in it for every call timed during the
+               turn, which chrome://tracing or https://ui.perfetto.dev show
+               as a timeline
+
+All times are in seconds from the start of the game, except in the Chrome
+format, whose timestamps and durations are in microseconds.
+
+NOTE: You do not have to run python-ta on this file.
+"""
+import json
+import os
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+TRACE_FORMATS = ['jsonl', 'chrome']
+
+# the name of each kind of timed call, and the field of its total time
+_TIMED_CALLS = {'strategy': 'strategy_time',
+                'validation': 'validation_time',
+                'apply': 'apply_time'}
+
+
+class TurnSpan:
+    """
+    The calls made during one turn of a game, and how long each took.
+
+    turn - the number of the turn, from 0
+    player - the name of the player whose turn it is
+    move - the move that was made, or None until it is
+    nodes - the number of states the strategy searched, if it reported them
+    calls - (name, start, end) of every timed call, with times from
+            time.perf_counter()
+    """
+    turn: int
+    player: str
+    move: Any
+    nodes: Optional[int]
+    calls: List[Tuple[str, float, float]]
+
+    def __init__(self, turn: int, player: str) -> None:
+        """
+        Initialize the span of turn, played by player.
+        """
+        self.turn = turn
+        self.player = player
+        self.move = None
+        self.nodes = None
+        self.calls = []
+
+    def timed(self, name: str, function: Callable[..., Any],
+              *args: Any) -> Any:
+        """
+        Return function called on args, recording the call as name.
+
+        >>> span = TurnSpan(0, 'p1')
+        >>> span.timed('apply', max, 1, 2)
+        2
+        >>> [call[0] for call in span.calls]
+        ['apply']
+        """
+        start = time.perf_counter()
+        result = function(*args)
+        self.calls.append((name, start, time.perf_counter()))
+        return result
+
+    def total(self, name: str) -> float:
+        """
+        Return the seconds spent in the calls recorded as name.
+        """
+        return sum(end - start for call, start, end in self.calls
+                   if call == name)
+
+    @property
+    def invalid_retries(self) -> int:
+        """
+        The number of moves the strategy picked before a valid one.
+
+        >>> span = TurnSpan(0, 'p1')
+        >>> for move in [None, -1, 4]:
+        ...     _ = span.timed('strategy', int, 0)
+        >>> span.invalid_retries
+        2
+        """
+        calls = sum(1 for call in self.calls if call[0] == 'strategy')
+        return max(0, calls - 1)
+
+    def to_record(self, origin: float) -> dict:
+        """
+        Return this span as a dictionary, with times in seconds from origin.
+        """
+        start = self.calls[0][1] if self.calls else origin
+        end = self.calls[-1][2] if self.calls else origin
+        record = {'turn': self.turn, 'player': self.player,
+                  'move': self.move, 'start': start - origin,
+                  'duration': end - start}
+        for name, field in _TIMED_CALLS.items():
+            record[field] = self.total(name)
+        record['invalid_retries'] = self.invalid_retries
+        record['nodes'] = self.nodes
+        return record
+
+    def to_events(self, origin: float) -> List[dict]:
+        """
+        Return this span as Chrome trace events, with timestamps in
+        microseconds from origin.
+        """
+        record = self.to_record(origin)
+        events = [{'name': 'turn {} ({})'.format(self.turn, self.player),
+                   'cat': 'turn', 'ph': 'X', 'pid': os.getpid(), 'tid': 1,
+                   'ts': record['start'] * 1e6,
+                   'dur': record['duration'] * 1e6,
+                   'args': {key: record[key] for key in
+                            ['move', 'invalid_retries', 'nodes']}}]
+        for name, start, end in self.calls:
+            events.append({'name': name, 'cat': 'call', 'ph': 'X',
+                           'pid': os.getpid(), 'tid': 1,
+                           'ts': (start - origin) * 1e6,
+                           'dur': (end - start) * 1e6})
+        return events
+
+
+class TurnTracer:
+    """
+    Writes the span of every turn of a game to a file.
+
+    path - the file spans are written to, which is replaced
+    trace_format - 'jsonl' or 'chrome', see TRACE_FORMATS
+    origin - the time.perf_counter() value times are measured from
+    """
+    path: str
+    trace_format: str
+    origin: float
+
+    def __init__(self, path: str, trace_format: Optional[str] = None) -> None:
+        """
+        Initialize a tracer writing to path, in trace_format or, if that is
+        None, in the Chrome format for a path ending in .json and as JSON
+        Lines otherwise.
+        """
+        if trace_format is None:
+            trace_format = 'chrome' if path.endswith('.json') else 'jsonl'
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError("Unknown trace format {!r}; use one of {}."
+                             .format(trace_format, TRACE_FORMATS))
+        self.path = path
+        self.trace_format = trace_format
+        self.origin = time.perf_counter()
+        self._file = open(path, 'w')
+        self._events = 0
+        if trace_format == 'chrome':
+            self._file.write('[')
+
+    def record(self, span: TurnSpan) -> None:
+        """
+        Write span to the file.
+        """
+        if self.trace_format == 'jsonl':
+            self._file.write(json.dumps(span.to_record(self.origin),
+                                        default=str) + '\n')
+        else:
+            for event in span.to_events(self.origin):
+                self._file.write((',\n' if self._events else '\n') +
+                                 json.dumps(event, default=str))
+                self._events += 1
+        self._file.flush()
+
+    def close(self) -> None:
+        """
+        Finish and close the file.
+        """
+        if self._file.closed:
+            return
+        if self.trace_format == 'chrome':
+            self._file.write('\n]\n')
+        self._file.close()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+    check_all(config="a2_pyta.txt")
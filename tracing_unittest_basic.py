@@ -0,0 +1,87 @@
+"""
+Unittests for tracing the turns of a game played through GameInterface.
+"""
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from game_interface import GameInterface, playable_games, usable_strategies
+from unittest_helpers import use_own_solver_table
+SubtractSquareGame = playable_games['s']
+solver_strategy = usable_strategies['ss']
+
+
+def clumsy_strategy(game):
+    """
+    Return an invalid move the first time game's state is seen, and the
+    solver's move the next time.
+    """
+    seen = getattr(game, 'seen_states', set())
+    game.seen_states = seen
+    if game.current_state.current_total not in seen:
+        seen.add(game.current_state.current_total)
+        return -1
+    return solver_strategy(game)
+
+
+class TracingUnitTests(unittest.TestCase):
+    def setUp(self):
+        use_own_solver_table(self)
+
+    def play_traced(self, trace_name, trace_format=None):
+        """
+        Play a game of SubtractSquare from 10 with tracing to the file
+        trace_name, and return the file's contents.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, trace_name)
+            with patch('builtins.input', return_value='10'), \
+                    redirect_stdout(io.StringIO()):
+                GameInterface(SubtractSquareGame, clumsy_strategy,
+                              solver_strategy, p1_starts=True,
+                              trace_path=path,
+                              trace_format=trace_format).play()
+            with open(path) as trace_file:
+                return trace_file.read()
+
+    def test_jsonl_spans(self):
+        """
+        Test that every turn is written as one line, with its invalid moves
+        counted and the time of each step.
+        """
+        spans = [json.loads(line) for line in
+                 self.play_traced('trace.jsonl').splitlines()]
+        self.assertEqual([span['turn'] for span in spans],
+                         list(range(len(spans))))
+        self.assertEqual(sum(span['move'] for span in spans), 10)
+        for span in spans:
+            retries = 1 if span['player'] == 'p1' else 0
+            self.assertEqual(span['invalid_retries'], retries)
+            self.assertGreaterEqual(span['duration'],
+                                    span['strategy_time'] +
+                                    span['apply_time'])
+
+    def test_chrome_trace_events(self):
+        """
+        Test that the Chrome format is a JSON array of complete events, one
+        for every turn and one for every call timed in it.
+        """
+        events = json.loads(self.play_traced('trace.json'))
+        turns = [event for event in events if event['cat'] == 'turn']
+        calls = [event for event in events if event['cat'] == 'call']
+        self.assertTrue(turns)
+        self.assertTrue(all(event['ph'] == 'X' for event in events))
+        # A turn validates no move yet, then each move its strategy picks,
+        # and applies the valid one, so an invalid move adds two calls.
+        self.assertEqual(len(calls), sum(
+            4 + 2 * turn['args']['invalid_retries'] for turn in turns))
+        with self.assertRaises(ValueError):
+            self.play_traced('trace.txt', 'xml')
+
+
+if __name__ == "__main__":
+    unittest.main()
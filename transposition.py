@@ -0,0 +1,346 @@
+"""
+Transposition tables for the minimax strategies: a bounded one kept in the
+memory of one process, and a fixed-size one shared between processes.
+
+NOTE: Make sure this file adheres to python-ta.
+"""
+import hashlib
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Any, Hashable, Optional
+
+DEFAULT_TABLE_SIZE = 1 << 20
+PROBE_LENGTH = 4
+
+_SCORE_BITS = 2
+_SCORE_MASK = (1 << _SCORE_BITS) - 1
+_MASK_64 = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """
+    A cache of solved positions, keyed on a hashable state key.
+
+    When more than max_size positions are stored, the least recently used
+    one is evicted.
+
+    max_size - the maximum number of positions kept in the table
+    hits - the number of lookups that found a stored position
+    misses - the number of lookups that did not
+    """
+    max_size: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = DEFAULT_TABLE_SIZE) -> None:
+        """
+        Initialize an empty table holding at most max_size positions.
+
+        >>> table = TranspositionTable(2)
+        >>> len(table), table.hits, table.misses
+        (0, 0, 0)
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        """
+        Return the number of positions stored in this table.
+        """
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Return whether key is stored in this table, without counting a lookup.
+        """
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Return the value stored under key, or None if it is not stored.
+
+        >>> table = TranspositionTable(2)
+        >>> table.get('a') is None
+        True
+        >>> table.put('a', 1)
+        >>> table.get('a')
+        1
+        >>> table.hits, table.misses
+        (1, 1)
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store value under key, evicting the least recently used position if
+        the table is full.
+
+        >>> table = TranspositionTable(2)
+        >>> table.put('a', 1)
+        >>> table.put('b', -1)
+        >>> _ = table.get('a')
+        >>> table.put('c', 1)
+        >>> 'b' in table, 'a' in table, 'c' in table
+        (False, True, True)
+        """
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+        elif len(entries) >= self.max_size:
+            entries.popitem(last=False)
+        entries[key] = value
+
+    def clear(self) -> None:
+        """
+        Remove every position and reset the hit and miss counters.
+        """
+        self._entries.clear()
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        """
+        Reset the hit and miss counters, keeping the stored positions.
+        """
+        self.hits = 0
+        self.misses = 0
+
+
+def key_hash(key: Hashable) -> int:
+    """
+    Return a 64-bit hash of key that is the same in every process.
+
+    The built-in hash() of a string differs between interpreters, so it
+    cannot be used to share keys between processes. An int, such as a
+    Zobrist hash, or an (int, player) pair, the keys minimax stores, is only
+    mixed with a few multiplications so that no string is built for it;
+    other keys are hashed by their repr().
+
+    >>> key_hash(((True, 3), 'p1')) == key_hash(((True, 3), 'p1'))
+    True
+    >>> key_hash((3, 'p1')) != key_hash((3, 'p2'))
+    True
+    >>> 0 <= key_hash('a') < 1 << 64, 0 <= key_hash(-1) < 1 << 64
+    (True, True)
+    """
+    if type(key) is int:
+        return _mix(key)
+    if type(key) is tuple and len(key) == 2 and type(key[0]) is int:
+        salt = _SALTS.get(key[1])
+        if salt is None:
+            salt = _SALTS[key[1]] = _digest(key[1])
+        return _mix(key[0] ^ salt)
+    return _digest(key)
+
+
+# the hash mixed into the int of an (int, player) key, by player
+_SALTS = {}
+
+
+def _digest(key: Hashable) -> int:
+    """
+    Return the 64-bit blake2b digest of the repr() of key.
+    """
+    digest = hashlib.blake2b(repr(key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def _mix(value: int) -> int:
+    """
+    Return value scrambled into 64 bits by the splitmix64 finalizer, which
+    maps different 64-bit values to different results.
+
+    >>> _mix(4) >> 2 != _mix(5) >> 2
+    True
+    """
+    value &= _MASK_64
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & _MASK_64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & _MASK_64
+    return value ^ (value >> 31)
+
+
+class SharedTranspositionTable:
+    """
+    A cache of solved positions in shared memory, which several processes
+    can read and write at the same time.
+
+    Every entry is one 64-bit word: the key's hash with its lowest
+    _SCORE_BITS bits replaced by the stored score plus 2, so that an empty
+    word is 0. A word is always written in one piece, so readers never see
+    half an entry and no locks are needed. A key is kept in one of the
+    PROBE_LENGTH slots after the one its hash points to; when those are all
+    taken by other keys, the first of them is replaced.
+
+    Only the scores GameState.LOSE, GameState.DRAW and GameState.WIN can be
+    stored. Pickling a table, e.g. to send it to a worker process, attaches
+    the copy to the same shared memory.
+
+    name - the name of the shared memory block holding the table
+    slots - the number of entries the table has room for, a power of two
+    hits - the number of lookups in this process that found a stored position
+    misses - the number of lookups in this process that did not
+    """
+    name: str
+    slots: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = DEFAULT_TABLE_SIZE,
+                 name: Optional[str] = None) -> None:
+        """
+        Create an empty table with room for at least max_size positions, or
+        attach to the existing table called name if it is given.
+
+        >>> table = SharedTranspositionTable(5)
+        >>> table.slots, len(table)
+        (8, 0)
+        >>> table.unlink()
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.hits = 0
+        self.misses = 0
+        self._owner = name is None
+        if name is None:
+            slots = 1 << (max_size - 1).bit_length()
+            self._memory = shared_memory.SharedMemory(create=True,
+                                                      size=slots * 8)
+        else:
+            self._memory = shared_memory.SharedMemory(name)
+        self.name = self._memory.name
+        self._words = self._memory.buf.cast('Q')
+        self.slots = len(self._words)
+
+    def __reduce__(self) -> tuple:
+        """
+        Return how to pickle this table: by the name of its shared memory.
+        """
+        return (SharedTranspositionTable, (self.slots, self.name))
+
+    def __len__(self) -> int:
+        """
+        Return the number of positions stored in this table.
+        """
+        return self.slots - self._words.tolist().count(0)
+
+    def _find(self, key: Hashable) -> tuple:
+        """
+        Return the hash of key without its score bits, and the slot holding
+        key or else the slot key would be stored in.
+        """
+        code = key_hash(key)
+        tag = code & ~_SCORE_MASK
+        mask = self.slots - 1
+        words = self._words
+        free = None
+        for probe in range(PROBE_LENGTH):
+            slot = (code + probe) & mask
+            word = words[slot]
+            if word & ~_SCORE_MASK == tag and word & _SCORE_MASK:
+                return tag, slot
+            if free is None and not word:
+                free = slot
+        return tag, code & mask if free is None else free
+
+    def __contains__(self, key: Hashable) -> bool:
+        """
+        Return whether key is stored in this table, without counting a lookup.
+        """
+        tag, slot = self._find(key)
+        word = self._words[slot]
+        return word & ~_SCORE_MASK == tag and word & _SCORE_MASK != 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Return the score stored under key, or None if it is not stored.
+
+        >>> table = SharedTranspositionTable(4)
+        >>> table.get('a') is None
+        True
+        >>> table.put('a', -1)
+        >>> table.get('a')
+        -1
+        >>> table.hits, table.misses
+        (1, 1)
+        >>> table.unlink()
+        """
+        tag, slot = self._find(key)
+        word = self._words[slot]
+        if word & ~_SCORE_MASK == tag and word & _SCORE_MASK:
+            self.hits += 1
+            return (word & _SCORE_MASK) - 2
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: int) -> None:
+        """
+        Store the score value under key, replacing another position if the
+        slots for key are full.
+
+        >>> table = SharedTranspositionTable(1)
+        >>> table.put('a', 1)
+        >>> table.put('b', 0)
+        >>> 'a' in table, table.get('b')
+        (False, 0)
+        >>> table.unlink()
+        """
+        if not -1 <= value <= 1:
+            raise ValueError("Only scores from -1 to 1 can be stored.")
+        tag, slot = self._find(key)
+        self._words[slot] = tag | (value + 2)
+
+    def clear(self) -> None:
+        """
+        Remove every position and reset the hit and miss counters.
+        """
+        self._memory.buf[:] = bytes(self.slots * 8)
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        """
+        Reset the hit and miss counters, keeping the stored positions.
+        """
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        """
+        Detach this process from the table. Closing a table twice does
+        nothing.
+        """
+        if self._words is not None:
+            self._words.release()
+            self._words = None
+            self._memory.close()
+
+    def __del__(self) -> None:
+        """
+        Detach this process from the table when the table is garbage
+        collected.
+        """
+        if getattr(self, '_words', None) is not None:
+            self.close()
+
+    def unlink(self) -> None:
+        """
+        Detach from the table and free its shared memory, which only the
+        process that created the table should do once every process is done.
+        """
+        self.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+
+    check_all(config="a2_pyta.txt")
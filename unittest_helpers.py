@@ -0,0 +1,27 @@
+"""
+Fixtures shared by the unittests.
+"""
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from subtract_square_solver import TABLE_ENV, get_solver
+
+
+def use_own_solver_table(test: unittest.TestCase) -> None:
+    """
+    Point the shared SubtractSquare solver at a table file of test's own,
+    instead of the one in the system's temporary directory, until test is
+    cleaned up.
+
+    The file is named in the environment, so the solvers of any worker
+    processes test starts use it too, however they are started.
+    """
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    path = os.path.join(directory.name, 'table.bin')
+    patcher = patch.dict(os.environ, {TABLE_ENV: path})
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    test.addCleanup(lambda: get_solver().close())
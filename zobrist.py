@@ -0,0 +1,58 @@
+"""
+Zobrist hashing for game states.
+
+A Zobrist hash is the XOR of one random 64-bit key for every feature of a
+state, such as a player holding a cell or whose turn it is. A move only has to
+XOR in and out the keys of the features it changes, so the hash is kept up to
+date in O(1) instead of being rebuilt from the whole state.
+
+The keys are drawn from a generator seeded with a fixed name, so a state has
+the same hash in every process and every run.
+
+NOTE: Make sure this file adheres to python-ta.
+"""
+import random
+from typing import List
+
+HASH_MASK = (1 << 64) - 1
+
+
+def make_keys(name: str, count: int) -> List[int]:
+    """
+    Return count random 64-bit keys, the same ones every time for name.
+
+    >>> make_keys('test', 3) == make_keys('test', 3)
+    True
+    >>> make_keys('test', 3) == make_keys('other', 3)
+    False
+    >>> all(0 <= key <= HASH_MASK for key in make_keys('test', 3))
+    True
+    """
+    generator = random.Random(name)
+    return [generator.getrandbits(64) for _ in range(count)]
+
+
+TURN_KEY = make_keys('turn', 1)[0]
+
+
+def mix(value: int) -> int:
+    """
+    Return a 64-bit key for the non-negative integer value, for features with
+    too many values to draw a key for each of them.
+
+    This is the finalizer of the SplitMix64 generator, which spreads every
+    bit of value over the whole key.
+
+    >>> mix(1) == mix(1), mix(1) == mix(2)
+    (True, False)
+    """
+    value = (value + 0x9E3779B97F4A7C15) & HASH_MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & HASH_MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & HASH_MASK
+    return value ^ (value >> 31)
+
+
+if __name__ == "__main__":
+    from python_ta import check_all
+
+    check_all(config="a2_pyta.txt")